@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Appointment
+from .models import Appointment, Patient, WaitlistEntry
+from .patients import with_upcoming
 
 
 @admin.register(Appointment)
@@ -30,4 +31,66 @@ class AppointmentAdmin(admin.ModelAdmin):
     
     ordering = ("-appointment_date", "-appointment_time")
     
-    list_per_page = 25
\ No newline at end of file
+    list_per_page = 25
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "patient_name",
+        "doctor",
+        "appointment_date",
+        "consultation_type",
+        "status",
+        "created_at",
+    )
+    
+    list_filter = (
+        "status",
+        "consultation_type",
+        "appointment_date",
+    )
+    
+    search_fields = (
+        "patient_name",
+        "patient_contact",
+        "doctor__name",
+    )
+    
+    readonly_fields = ("id", "appointment", "created_at", "promoted_at")
+    
+    ordering = ("appointment_date", "created_at")
+
+
+@admin.register(Patient)
+class PatientAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "contact",
+        "total_appointments",
+        "upcoming_appointments",
+        "cancelled_appointments",
+        "created_at",
+    )
+    
+    search_fields = (
+        "name",
+        "contact",
+    )
+    
+    readonly_fields = (
+        "id",
+        "total_appointments",
+        "upcoming_appointments",
+        "cancelled_appointments",
+        "created_at",
+        "updated_at",
+    )
+    
+    list_per_page = 25
+
+    def get_queryset(self, request):
+        return with_upcoming(super().get_queryset(request))
+
+    @admin.display(ordering="upcoming_appointments")
+    def upcoming_appointments(self, obj):
+        return obj.upcoming_appointments
@@ -0,0 +1,226 @@
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Case, Count, Exists, IntegerField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from doctors.models import Doctor
+from doctors.profile_cache import get_profile
+from doctors.schedules import get_day_grid, get_schedules, on_grid, slot_capacity
+from doctors.slots import TICK_LABELS, TICK_MINUTES, TICKS_PER_DAY, iter_ticks, labels_of, mask_from_bytes, time_to_tick
+
+from .holds import held_times
+from .models import ACTIVE_STATUSES, Appointment, DoctorDayOccupancy, SlotHold
+from .occupancy import booked_mask
+from .zones import clinic_today, default_zone_name, past_mask
+
+
+def doctor_zone(doctor_id):
+    profile = get_profile(doctor_id)
+    return profile.timezone if profile is not None else default_zone_name()
+
+
+def open_slots(doctor_id, day):
+    """
+    ``(mask, zone)``: a doctor's slots on ``day`` that are neither booked,
+    held nor already started in the clinic's zone, and that zone's name.
+    """
+    zone = doctor_zone(doctor_id)
+    grid = get_day_grid(doctor_id, day)
+    taken = (
+        booked_mask(doctor_id, day)
+        | grid.mask_of(held_times(doctor_id, day))
+        | past_mask(zone, day)
+    )
+    return grid.free(taken), zone
+
+
+def available_slots(doctor_id, day):
+    """Clinic-local ``"HH:MM"`` labels of a doctor's open slots on ``day``."""
+    return labels_of(open_slots(doctor_id, day)[0])
+
+
+def _slot_count(rows):
+    return Coalesce(
+        Subquery(
+            rows.order_by().values('doctor').annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def taken_slot_count(day, from_tick=0):
+    """
+    How many of each doctor's (the outer query's ``pk``) grid slots on
+    ``day`` from tick ``from_tick`` on are booked or held. Bookings and
+    holds off the grid, and holds on booked slots, take nothing.
+    """
+    from_minute = from_tick * TICK_MINUTES
+    booked = Appointment.objects.filter(appointment_date=day, status__in=ACTIVE_STATUSES)
+    held = SlotHold.objects.filter(appointment_date=day, expires_at__gt=timezone.now()).exclude(
+        Exists(booked.filter(doctor=OuterRef('doctor'), appointment_time=OuterRef('appointment_time')))
+    )
+    booked, held = (
+        _slot_count(on_grid(rows.filter(doctor=OuterRef('pk')), day).filter(slot_minute__gte=from_minute))
+        for rows in (booked, held)
+    )
+    return booked + held
+
+
+def with_free_slots(doctors, day):
+    """
+    Annotate ``free_slots`` for ``day`` and keep only doctors with at least
+    one open slot, counted as open_slots does: grid slots neither booked,
+    held nor already started in the clinic's zone. Doctors are grouped by
+    how much of ``day`` has started in their zone (one query for the
+    zones); each group's count is schedule capacity from that point on
+    less the taken slots, all in SQL.
+    """
+    zones_by_start = defaultdict(list)
+    for zone in doctors.order_by().values_list('timezone', flat=True).distinct():
+        from_tick = past_mask(zone, day).bit_length()
+        if from_tick < TICKS_PER_DAY:
+            zones_by_start[from_tick].append(zone)
+
+    return doctors.annotate(
+        free_slots=Case(
+            *[
+                When(
+                    timezone__in=zones,
+                    then=slot_capacity(day, from_tick) - taken_slot_count(day, from_tick),
+                )
+                for from_tick, zones in zones_by_start.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    ).filter(free_slots__gt=0)
+
+
+def free_slots_state(day):
+    """
+    What with_free_slots' counts for ``day`` depend on besides Doctor
+    rows: the newest occupancy write, the live holds and, per clinic
+    zone, how much of the day has started. Used as ETag parts.
+    """
+    occupancy = DoctorDayOccupancy.objects.filter(date=day).aggregate(last=Max('updated_at'))
+    holds = SlotHold.objects.filter(appointment_date=day, expires_at__gt=timezone.now()).aggregate(
+        count=Count('pk'), last=Max('created_at')
+    )
+    zones = Doctor.objects.order_by('timezone').values_list('timezone', flat=True).distinct()
+    return (
+        occupancy['last'] and occupancy['last'].isoformat(),
+        holds['count'],
+        holds['last'] and holds['last'].isoformat(),
+        [past_mask(zone, day) for zone in zones],
+    )
+
+
+def taken_masks(doctor_ids, start, end):
+    """
+    ``{(str(doctor_id), date): mask}`` of booked or held slots over
+    ``[start, end]``: one range query over DoctorDayOccupancy and one over
+    live SlotHolds. Days with nothing taken are absent.
+    """
+    rows = DoctorDayOccupancy.objects.filter(
+        doctor_id__in=doctor_ids,
+        date__range=(start, end),
+    ).values_list('doctor_id', 'date', 'booked_mask')
+    taken = {(str(doctor_id), day): mask_from_bytes(mask) for doctor_id, day, mask in rows}
+
+    holds = SlotHold.objects.filter(
+        doctor_id__in=doctor_ids,
+        appointment_date__range=(start, end),
+        expires_at__gt=timezone.now(),
+    ).values_list('doctor_id', 'appointment_date', 'appointment_time')
+    for doctor_id, day, slot in holds:
+        tick = time_to_tick(slot)
+        if tick is not None:
+            key = (str(doctor_id), day)
+            taken[key] = taken.get(key, 0) | 1 << tick
+    return taken
+
+
+def availability_grid(doctor_ids, start, end):
+    """
+    Free slots for every ``(doctor, day)`` in ``doctor_ids`` x ``[start, end]``
+    as ``{doctor_id: {"YYYY-MM-DD": ["HH:MM", ...]}}``. Unknown and inactive
+    doctors are left out.
+
+    One query for the doctors' zones and two for bookings and holds (see
+    taken_masks), plus a schedule load for doctors not in the schedule
+    cache, however many cells are requested.
+    """
+    zones = {
+        str(pk): zone
+        for pk, zone in Doctor.objects.filter(pk__in=doctor_ids, is_active=True).values_list('pk', 'timezone')
+    }
+    doctor_ids = [str(pk) for pk in doctor_ids if str(pk) in zones]
+    if not doctor_ids:
+        return {}
+    schedules = get_schedules(doctor_ids)
+    taken = taken_masks(doctor_ids, start, end)
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    past = {(zone, day): past_mask(zone, day) for zone in set(zones.values()) for day in days}
+    grid = {}
+    for doctor_id in doctor_ids:
+        zone = zones[doctor_id]
+        grid[doctor_id] = {}
+        for day in days:
+            slots = schedules[doctor_id].grid(day)
+            free = slots.free(taken.get((doctor_id, day), 0) | past[zone, day])
+            grid[doctor_id][day.isoformat()] = slots.labels(free)
+    return grid
+
+
+def _tagged_ticks(mask, doctor_id):
+    for tick in iter_ticks(mask):
+        yield tick, doctor_id
+
+
+def next_available(doctor_zones, limit, horizon):
+    """
+    The ``limit`` earliest open slots across ``doctor_zones`` (doctor id
+    to clinic zone name), starting today in each clinic's zone and
+    looking ``horizon`` days ahead, as ``(date, "HH:MM", doctor_id)``
+    tuples in clinic-local time. Scans windows of 1, 2, 4, ... days with
+    two queries each and stops once ``limit`` slots are found, so a busy
+    horizon only costs what it takes to find the answer. Within a day,
+    per-doctor free masks are merged lazily in time order.
+    """
+    doctor_zones = {str(pk): zone for pk, zone in doctor_zones.items()}
+    if not doctor_zones:
+        return []
+    doctor_ids = list(doctor_zones)
+    schedules = get_schedules(doctor_ids)
+    start = min(clinic_today(zone) for zone in set(doctor_zones.values()))
+    last = start + timedelta(days=horizon - 1)
+    results = []
+
+    window_start, window = start, 1
+    while window_start <= last and len(results) < limit:
+        window_end = min(window_start + timedelta(days=window - 1), last)
+        taken = taken_masks(doctor_ids, window_start, window_end)
+
+        day = window_start
+        while day <= window_end and len(results) < limit:
+            past = {zone: past_mask(zone, day) for zone in set(doctor_zones.values())}
+            streams = []
+            for doctor_id, zone in doctor_zones.items():
+                grid = schedules[doctor_id].grid(day)
+                free = grid.free(taken.get((doctor_id, day), 0) | past[zone])
+                if free:
+                    streams.append(_tagged_ticks(free, doctor_id))
+            for tick, doctor_id in heapq.merge(*streams):
+                results.append((day, TICK_LABELS[tick], doctor_id))
+                if len(results) == limit:
+                    break
+            day += timedelta(days=1)
+
+        window_start = window_end + timedelta(days=1)
+        window *= 2
+    return results
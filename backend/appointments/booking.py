@@ -0,0 +1,242 @@
+"""
+Booking engine.
+
+A booking is one INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING:
+the SELECT reads the doctor row, so the doctor must be active and offer
+the consultation mode at the moment of the insert, and the active-slot
+unique index settles races. Losing a race is an empty RETURNING, not an
+IntegrityError, so the surrounding transaction stays usable and the
+loser gets alternative slots back straight away.
+"""
+import uuid
+from collections import namedtuple
+
+from django.db import IntegrityError, connection, transaction
+
+from doctors.models import CONSULTATION_MODES, Doctor, consultation_mode_bit, supports_mode_filter
+from doctors.profile_cache import DoctorProfile, get_profile, invalidate_profile
+from doctors.slots import TICK_LABELS, iter_ticks, time_to_tick
+
+from .availability import next_available, open_slots
+from .contacts import contact_columns
+from .holds import active_hold
+from .models import Appointment, SlotHold
+from .patients import patient_for
+from .signals import appointment_changed
+
+BOOKED = 'booked'
+CONFLICT = 'conflict'
+REJECTED = 'rejected'
+
+# Conflict / rejection reasons.
+SLOT_TAKEN = 'slot_taken'
+SLOT_HELD = 'slot_held'
+DOCTOR_INACTIVE = 'doctor_inactive'
+MODE_UNSUPPORTED = 'mode_unsupported'
+
+BOOKING_ERRORS = {
+    SLOT_TAKEN: "This time slot is already booked. Please choose another time.",
+    SLOT_HELD: "This time slot is being held by another patient. Please choose another time.",
+    DOCTOR_INACTIVE: "This doctor is currently not available for appointments",
+    MODE_UNSUPPORTED: "The doctor does not offer this consultation type",
+}
+
+
+class BookingResult(namedtuple('BookingResult', ['status', 'appointment', 'reason', 'alternatives'])):
+    """
+    Outcome of book_appointment. ``alternatives`` lists ``(date, "HH:MM")``
+    open slots with the same doctor when the requested one was lost.
+    """
+
+    __slots__ = ()
+
+    @property
+    def booked(self):
+        return self.status == BOOKED
+
+
+def book_appointment(
+    doctor,
+    *,
+    patient_name,
+    patient_contact,
+    consultation_type,
+    appointment_date,
+    appointment_time,
+    hold_token=None,
+    alternatives=3,
+):
+    """
+    Book a slot. ``doctor`` is a DoctorProfile (so a caller that already
+    looked the doctor up pays nothing more) or a doctor id. Slot-grid and
+    field validation are the caller's job; this checks what can change
+    between validation and insert: the doctor's state, holds and the slot.
+    The profile may be stale, so the doctor's state is judged by the
+    insert itself (see insert_if_bookable).
+    """
+    profile = doctor if isinstance(doctor, DoctorProfile) else get_profile(doctor)
+    if profile is None:
+        return BookingResult(REJECTED, None, DOCTOR_INACTIVE, [])
+    if consultation_type not in CONSULTATION_MODES:
+        return BookingResult(REJECTED, None, MODE_UNSUPPORTED, [])
+
+    doctor_id = uuid.UUID(profile.data['id'])
+    contact_normalized, contact_suffix = contact_columns(patient_contact)
+    appointment = Appointment(
+        doctor_id=doctor_id,
+        patient_name=patient_name,
+        patient_contact=patient_contact,
+        contact_normalized=contact_normalized,
+        contact_suffix=contact_suffix,
+        consultation_type=consultation_type,
+        appointment_date=appointment_date,
+        appointment_time=appointment_time,
+        status='pending',
+    )
+
+    with transaction.atomic():
+        hold = active_hold(doctor_id, appointment_date, appointment_time)
+        if hold is not None and hold.token != hold_token:
+            reason = SLOT_HELD
+        else:
+            reason = insert_if_bookable(appointment)
+            if reason is None:
+                # Only a booking that went in gets a patient, so a lost
+                # race or a rejected request leaves no Patient row behind.
+                appointment.patient_id = patient_for(contact_normalized, patient_name)
+                if appointment.patient_id is not None:
+                    Appointment.objects.filter(pk=appointment.pk).update(patient_id=appointment.patient_id)
+                    appointment._loaded_state = appointment.tracked_state()
+                if hold is not None:
+                    # The hold is used up; the appointment now occupies the slot.
+                    SlotHold.objects.filter(token=hold.token).delete()
+                appointment_changed(None, appointment.tracked_state())
+
+    if reason in (DOCTOR_INACTIVE, MODE_UNSUPPORTED):
+        # The cached profile said otherwise; let the next lookup reload it.
+        invalidate_profile(doctor_id)
+        return BookingResult(REJECTED, None, reason, [])
+    if reason is not None:
+        return BookingResult(
+            CONFLICT, None, reason,
+            alternative_slots(doctor_id, profile.timezone, appointment_date, appointment_time, alternatives),
+        )
+
+    # The response only needs the doctor's public fields, which the
+    # profile already has; avoid a lazy load of the row.
+    appointment.doctor = profile_doctor(profile)
+    return BookingResult(BOOKED, appointment, None, [])
+
+
+def insert_if_bookable(appointment):
+    """
+    INSERT ``appointment`` if its doctor is active and offers its
+    consultation type, unless it collides with a unique index. Returns
+    None if the row was written, else the reason it was not. Fills in
+    auto fields such as created_at.
+    """
+    fields = appointment._meta.concrete_fields
+    values = [field.pre_save(appointment, add=True) for field in fields]
+    mode_bit = consultation_mode_bit(appointment.consultation_type)
+
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        eligible = Doctor.objects.filter(pk=appointment.doctor_id, is_active=True).filter(
+            supports_mode_filter(appointment.consultation_type)
+        )
+        if not eligible.exists():
+            return _ineligible_reason(appointment)
+        try:
+            with transaction.atomic():
+                Appointment.objects.bulk_create([appointment])
+        except IntegrityError:
+            return SLOT_TAKEN
+        _mark_saved(appointment)
+        return None
+
+    qn = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        # Bare parameters in a SELECT list are untyped on PostgreSQL.
+        params_sql = ', '.join(f'%s::{field.cast_db_type(connection)}' for field in fields)
+    else:
+        params_sql = ', '.join(['%s'] * len(fields))
+    # SQLite needs the WHERE clause to tell ON CONFLICT apart from a join.
+    sql = (
+        'INSERT INTO {table} ({columns}) SELECT {params} FROM {doctors} '
+        'WHERE {doctor_pk} = %s AND {is_active} AND ({mode_mask} & %s) <> 0 '
+        'ON CONFLICT DO NOTHING RETURNING {pk}'
+    ).format(
+        table=qn(appointment._meta.db_table),
+        columns=', '.join(qn(field.column) for field in fields),
+        params=params_sql,
+        doctors=qn(Doctor._meta.db_table),
+        doctor_pk=qn(Doctor._meta.pk.column),
+        is_active=qn(Doctor._meta.get_field('is_active').column),
+        mode_mask=qn(Doctor._meta.get_field('consultation_mode_mask').column),
+        pk=qn(appointment._meta.pk.column),
+    )
+    params = [field.get_db_prep_save(value, connection) for field, value in zip(fields, values)]
+    params += [Doctor._meta.pk.get_db_prep_value(appointment.doctor_id, connection), mode_bit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if cursor.fetchone() is None:
+            return _ineligible_reason(appointment)
+    _mark_saved(appointment)
+    return None
+
+
+def _ineligible_reason(appointment):
+    """Why an insert wrote nothing: the doctor's state, else the slot."""
+    doctor = (
+        Doctor.objects.filter(pk=appointment.doctor_id)
+        .values('is_active', 'consultation_mode_mask')
+        .first()
+    )
+    if doctor is None or not doctor['is_active']:
+        return DOCTOR_INACTIVE
+    if not doctor['consultation_mode_mask'] & consultation_mode_bit(appointment.consultation_type):
+        return MODE_UNSUPPORTED
+    return SLOT_TAKEN
+
+
+def _mark_saved(appointment):
+    appointment._state.adding = False
+    appointment._state.db = connection.alias
+    appointment._loaded_state = appointment.tracked_state()
+
+
+def profile_doctor(profile):
+    """Unsaved Doctor carrying the profile's fields, for rendering only."""
+    data = profile.data
+    doctor = Doctor(
+        id=uuid.UUID(data['id']),
+        name=data['name'],
+        specialization=data['specialization'],
+        bio=data['bio'],
+        years_of_experience=data['years_of_experience'],
+        _consultation_modes=data['consultation_modes'],
+        timezone=profile.timezone,
+        is_active=profile.is_active,
+        consultation_mode_mask=profile.consultation_mode_mask,
+        updated_at=profile.updated_at,
+    )
+    doctor._state.adding = False
+    return doctor
+
+
+def alternative_slots(doctor_id, zone, day, slot, limit):
+    """
+    Up to ``limit`` open slots with the same doctor: the closest ones on
+    the requested day, else the earliest on later days.
+    """
+    if limit <= 0:
+        return []
+    free, _ = open_slots(doctor_id, day)
+    wanted = time_to_tick(slot) or 0
+    nearest = sorted(iter_ticks(free), key=lambda tick: (abs(tick - wanted), tick))[:limit]
+    if nearest:
+        return [(day, TICK_LABELS[tick]) for tick in sorted(nearest)]
+    return [
+        (found_day, label)
+        for found_day, label, _ in next_available({doctor_id: zone}, limit, 30)
+        if found_day > day
+    ]
@@ -0,0 +1,55 @@
+"""
+Patient contact normalization.
+
+Contacts are stored as typed, plus a digits-only form (E.164 without the
+"+", or the national number when typed without a country code) and its
+last ten digits, the national number. A national trunk "0" is dropped
+like an international "00" prefix. Lookups go through the indexed
+suffix, so "+91 98765-43210", "098765 43210" and "9876543210" all find
+the same appointments.
+"""
+from django.db.models import Q
+
+SUFFIX_DIGITS = 10
+
+
+def normalize_contact(value):
+    """
+    Digits of ``value``, without a leading 00 international prefix, a
+    leading national trunk 0, or a "(0)" trunk written after the country
+    code.
+    """
+    value = (value or '').strip().replace('(0)', '')
+    digits = ''.join(ch for ch in value if '0' <= ch <= '9')
+    if value.startswith('00'):
+        digits = digits[2:]
+    elif not value.startswith('+') and digits.startswith('0'):
+        digits = digits[1:]
+    return digits
+
+
+def contact_suffix(normalized):
+    return normalized[-SUFFIX_DIGITS:]
+
+
+def contact_columns(value):
+    """``(contact_normalized, contact_suffix)`` for a raw contact."""
+    normalized = normalize_contact(value)
+    return normalized, contact_suffix(normalized)
+
+
+def contact_filter(query):
+    """
+    Q matching appointments for a contact as typed by the patient, or None
+    if it has too few digits to name one number. A national number
+    matches it with any country code; a full number matches itself or the
+    same number stored without its country code.
+    """
+    normalized = normalize_contact(query)
+    if len(normalized) < SUFFIX_DIGITS:
+        return None
+    suffix = contact_suffix(normalized)
+    lookup = Q(contact_suffix=suffix)
+    if normalized != suffix:
+        lookup &= Q(contact_normalized__in=[normalized, suffix])
+    return lookup
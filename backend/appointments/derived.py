@@ -0,0 +1,184 @@
+"""
+Per doctor-day tables derived from appointments: DoctorDayOccupancy and
+BookingRollup.
+
+Each is kept by a write hook in signals.appointment_changed that locks
+and adjusts one row per affected key, and each can be compared with and
+rebuilt from the appointments it summarizes. A DerivedTable describes
+one such table; the helpers here do the locking, diffing and rebuilding
+the tables share.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from .models import Appointment
+
+# model: the derived model. label: its name in command output.
+# key_fields: the fields identifying a row, doctor and date first.
+# value_fields: the fields a rebuild writes.
+# compute(appointments): {key: value} implied by an Appointment queryset.
+# value_of(row): a row's stored value, comparable with computed ones.
+# set_value(row, value): writes value onto row's value_fields, returns row.
+# describe(value): short text for a value in --verify reports.
+# empty: the value of a key with no appointments.
+DerivedTable = namedtuple(
+    'DerivedTable',
+    ['model', 'label', 'key_fields', 'value_fields', 'compute', 'value_of', 'set_value', 'describe', 'empty'],
+)
+
+
+def locked_row(model, create, **key):
+    """
+    The ``model`` row for ``key``, locked for update. Created when missing
+    if ``create``; otherwise None, so a release never creates a row and a
+    cascading doctor delete does not re-create rows it already removed.
+    """
+    rows = model.objects.select_for_update()
+    if create:
+        row, _ = rows.get_or_create(**key)
+        return row
+    return rows.filter(**key).first()
+
+
+def apply_changes(changes, adjust):
+    """
+    Call ``adjust(key, item, delta)`` for each ``(key, item, delta)`` in
+    one transaction. Keys are tuples starting with a doctor id; they are
+    visited in order so concurrent writes cannot deadlock. Must run inside
+    the transaction that wrote the appointment.
+    """
+    changes = sorted(changes, key=lambda change: (str(change[0][0]), *change[0][1:]))
+    with transaction.atomic():
+        for key, item, delta in changes:
+            adjust(key, item, delta)
+
+
+def _key_of(table, row):
+    return tuple(getattr(row, field) for field in table.key_fields)
+
+
+def diff_rows(table, expected, rows):
+    """
+    Compare stored ``rows`` of ``table`` with ``expected``, its
+    ``{key: value}`` as recomputed from appointments. Returns ``(missing,
+    wrong, stale)``: expected entries with no row, ``(row, expected
+    value)`` pairs that differ, and rows whose appointments are all gone.
+    """
+    missing, wrong, stale = {}, [], []
+    seen = set()
+    for row in rows.iterator(chunk_size=5000):
+        key = _key_of(table, row)
+        seen.add(key)
+        value = expected.get(key, table.empty)
+        if table.value_of(row) == value:
+            continue
+        if value == table.empty:
+            stale.append(row)
+        else:
+            wrong.append((row, value))
+    for key, value in expected.items():
+        if key not in seen:
+            missing[key] = value
+    return missing, wrong, stale
+
+
+def _new_row(table, key, value):
+    return table.set_value(table.model(**dict(zip(table.key_fields, key))), value)
+
+
+def rebuild(table, appointments, rows, batch_size=1000):
+    """
+    Rewrite ``rows`` of ``table`` from ``appointments`` in one transaction
+    and return ``(missing, wrong, stale)`` as they were found.
+
+    Every row is locked before anything is recomputed. Keys that have
+    appointments but no row get an empty row first, so they are locked
+    too: a booking that commits before the lock is counted by the
+    recompute, and one still in flight waits for the rebuild and then
+    applies its own change on top.
+    """
+    with transaction.atomic():
+        existing = set(rows.values_list(*table.key_fields))
+        created = [key for key in table.compute(appointments) if key not in existing]
+        table.model.objects.bulk_create(
+            [_new_row(table, key, table.empty) for key in created],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        list(rows.select_for_update().order_by(*table.key_fields).values_list('pk', flat=True))
+
+        missing, wrong, stale = diff_rows(table, table.compute(appointments), rows)
+        table.model.objects.bulk_create(
+            [_new_row(table, key, value) for key, value in missing.items()],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        table.model.objects.bulk_update(
+            [table.set_value(row, value) for row, value in wrong],
+            table.value_fields,
+            batch_size=batch_size,
+        )
+        table.model.objects.filter(pk__in=[row.pk for row in stale]).delete()
+
+    # Rows created empty above were missing, not wrong.
+    created = set(created)
+    for row, value in wrong:
+        if _key_of(table, row) in created:
+            missing[_key_of(table, row)] = value
+    wrong = [(row, value) for row, value in wrong if _key_of(table, row) not in created]
+    return missing, wrong, stale
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}. Use YYYY-MM-DD')
+
+
+def add_rebuild_arguments(parser):
+    """The options shared by the rebuild_* commands."""
+    parser.add_argument('--verify', action='store_true', help='Report mismatches without writing.')
+    parser.add_argument('--doctor', help='Limit to one doctor id.')
+    parser.add_argument('--since', type=parse_date, help='Only days on or after YYYY-MM-DD.')
+    parser.add_argument('--batch-size', type=int, default=1000)
+
+
+def run_rebuild(command, table, options):
+    """
+    The body of a rebuild_* command: recompute ``table`` from
+    appointments, or with --verify only report drift on the command's
+    stderr and fail if there is any.
+    """
+    appointments = Appointment.objects.all()
+    rows = table.model.objects.all()
+    if options['doctor']:
+        appointments = appointments.filter(doctor_id=options['doctor'])
+        rows = rows.filter(doctor_id=options['doctor'])
+    if options['since']:
+        appointments = appointments.filter(appointment_date__gte=options['since'])
+        rows = rows.filter(date__gte=options['since'])
+    label = table.label.capitalize()
+
+    if not options['verify']:
+        missing, wrong, stale = rebuild(table, appointments, rows, options['batch_size'])
+        summary = f'{len(missing)} missing, {len(wrong)} wrong, {len(stale)} stale'
+        command.stdout.write(command.style.SUCCESS(f'Rebuilt {table.label}: {summary}'))
+        return
+
+    missing, wrong, stale = diff_rows(table, table.compute(appointments), rows)
+    for key, value in missing.items():
+        command.stderr.write(f'missing: {" ".join(map(str, key))} ({table.describe(value)})')
+    for row, value in wrong:
+        command.stderr.write(
+            f'wrong: {" ".join(map(str, _key_of(table, row)))} '
+            f'({table.describe(table.value_of(row))} stored, {table.describe(value)} expected)'
+        )
+    for row in stale:
+        command.stderr.write(f'stale: {" ".join(map(str, _key_of(table, row)))}')
+    if missing or wrong or stale:
+        raise CommandError(f'{label} drift: {len(missing)} missing, {len(wrong)} wrong, {len(stale)} stale')
+    command.stdout.write(command.style.SUCCESS(f'{label}: no drift from appointments'))
@@ -0,0 +1,170 @@
+"""
+Slot-taken / slot-freed events for clients watching one (doctor, date).
+
+Appointment writes publish through the broker named by SLOT_EVENT_BROKER
+after their transaction commits; the SSE view subscribes to it. The
+default InProcessBroker fans out within one server process only; a
+deployment running several workers should point the setting at a broker
+backed by a shared bus (e.g. Redis pub/sub) with the same interface.
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from doctors.slots import TICK_LABELS, time_to_tick
+
+SLOT_TAKEN = 'slot-taken'
+SLOT_FREED = 'slot-freed'
+RESYNC = 'resync'
+
+
+def channel_name(doctor_id, day):
+    return f'slots:{doctor_id}:{day.isoformat()}'
+
+
+class Subscription:
+    """
+    A subscriber's bounded event queue, bound to the event loop that
+    created it. If the consumer falls behind, queued events are dropped
+    and a single ``resync`` event tells it to refetch the slot list.
+    """
+
+    def __init__(self, broker, channel, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def deliver(self, event):
+        # Always called on self.loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': RESYNC})
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+
+class SlotEventBroker:
+    """Interface for SLOT_EVENT_BROKER implementations."""
+
+    def publish(self, channel, event):
+        """Send ``event`` (a JSON-serializable dict) to ``channel``. Callable from any thread."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a Subscription for ``channel``; must be called from a running event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(SlotEventBroker):
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                subscription.close()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'SLOT_EVENT_BROKER', 'appointments.events.InProcessBroker')
+    return import_string(path)()
+
+
+def _label(slot):
+    tick = time_to_tick(slot)
+    return TICK_LABELS[tick] if tick is not None else slot.strftime('%H:%M')
+
+
+def publish_slot_change(before, after):
+    """
+    Publish the deltas between two Appointment.slot_state() values. Call
+    only once the write has committed.
+    """
+    if before == after:
+        return
+    broker = get_broker()
+    for state, kind in ((before, SLOT_FREED), (after, SLOT_TAKEN)):
+        if state is None:
+            continue
+        doctor_id, day, slot = state
+        broker.publish(channel_name(doctor_id, day), {
+            'type': kind,
+            'doctor_id': str(doctor_id),
+            'date': day.isoformat(),
+            'time': _label(slot),
+        })
+
+
+def sse_message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def slot_event_stream(doctor_id, day, snapshot):
+    """
+    SSE body for one (doctor, day): an ``available-slots`` snapshot from the
+    sync ``snapshot()`` callable, then deltas until the client goes away.
+    Subscribing before taking the snapshot means no change falls between
+    the two.
+    """
+    keepalive = getattr(settings, 'SLOT_EVENT_KEEPALIVE', 15)
+    subscription = get_broker().subscribe(channel_name(doctor_id, day))
+    try:
+        yield sse_message('available-slots', {
+            'doctor_id': str(doctor_id),
+            'date': day.isoformat(),
+            'available_slots': await sync_to_async(snapshot)(),
+        })
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield sse_message(event['type'], event)
+    finally:
+        subscription.close()
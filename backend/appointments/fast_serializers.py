@@ -0,0 +1,47 @@
+from doctors.fast_serializers import (
+    FastDoctorListSerializer,
+    FastSerializer,
+    Field,
+    as_datetime,
+    as_iso,
+    as_str,
+)
+
+
+class FastAppointmentDetailSerializer(FastSerializer):
+    """Fast path equivalent of AppointmentDetailSerializer."""
+
+    fields = (
+        Field('id', convert=as_str),
+        Field('doctor', nested=FastDoctorListSerializer, sideload_as='doctors'),
+        Field('patient_name'),
+        Field('patient_contact'),
+        Field('consultation_type'),
+        Field('appointment_date', convert=as_iso),
+        Field('appointment_time', convert=as_iso),
+        Field('status'),
+        Field('created_at', convert=as_datetime),
+    )
+
+
+class FastAppointmentAdminSerializer(FastSerializer):
+    """
+    Fast path equivalent of AppointmentAdminSerializer. ``expand=doctor``
+    adds a ``doctor`` id per row and side-loads the doctors once.
+    """
+
+    fields = (
+        Field('id', convert=as_str),
+        Field('patient_name'),
+        Field('patient_contact'),
+        Field('consultation_type'),
+        Field('appointment_date', convert=as_iso),
+        Field('appointment_time', convert=as_iso),
+        Field('status'),
+        Field('doctor_name', 'doctor__name'),
+        Field('doctor_specialization', 'doctor__specialization'),
+        Field('created_at', convert=as_datetime),
+    )
+    expandable = (
+        Field('doctor', nested=FastDoctorListSerializer, sideload_as='doctors'),
+    )
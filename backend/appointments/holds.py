@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from doctors.slots import mask_from_bytes, time_to_tick
+
+from .derived import locked_row
+from .events import publish_slot_change
+from .models import DoctorDayOccupancy, SlotHold
+from .signals import slots_freed
+
+_reap_lock = threading.Lock()
+_last_reap = None
+
+
+def hold_minutes():
+    return getattr(settings, 'SLOT_HOLD_MINUTES', 5)
+
+
+def max_holds_per_client():
+    return getattr(settings, 'SLOT_HOLD_MAX_PER_CLIENT', 3)
+
+
+def live_hold_count(client):
+    return SlotHold.objects.filter(client=client, expires_at__gt=timezone.now()).count()
+
+
+def place_hold(doctor_id, day, slot, client=''):
+    """
+    Reserve a slot for SLOT_HOLD_MINUTES on behalf of ``client``. Returns
+    the hold, or None if the slot is booked.
+
+    The insert settles races: an expired hold on the same slot is
+    replaced, and a live one makes it raise IntegrityError through the
+    unique_doctor_slot_hold constraint. The booked check comes after the
+    insert, under the day's occupancy row lock that bookings take as they
+    write, so a booking still in flight is seen once it commits.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        SlotHold.objects.filter(
+            doctor_id=doctor_id,
+            appointment_date=day,
+            appointment_time=slot,
+            expires_at__lte=now,
+        ).delete()
+        hold = SlotHold.objects.create(
+            doctor_id=doctor_id,
+            appointment_date=day,
+            appointment_time=slot,
+            expires_at=now + timedelta(minutes=hold_minutes()),
+            client=client[:255],
+        )
+        occupancy = locked_row(DoctorDayOccupancy, True, doctor_id=doctor_id, date=day)
+        tick = time_to_tick(slot)
+        if tick is not None and (mask_from_bytes(occupancy.booked_mask) >> tick) & 1:
+            hold.delete()
+            return None
+        state = hold.slot_state()
+        transaction.on_commit(lambda: publish_slot_change(None, state))
+    return hold
+
+
+def release_hold(token):
+    """Delete a live hold by token. Returns False if there was none."""
+    with transaction.atomic():
+        hold = SlotHold.objects.filter(token=token, expires_at__gt=timezone.now()).first()
+        if hold is None:
+            return False
+        hold.delete()
+        state = hold.slot_state()
+        transaction.on_commit(lambda: publish_slot_change(state, None))
+        slots_freed([state])
+    return True
+
+
+def active_hold(doctor_id, day, slot):
+    return SlotHold.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date=day,
+        appointment_time=slot,
+        expires_at__gt=timezone.now(),
+    ).first()
+
+
+def held_times(doctor_id, day):
+    return SlotHold.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date=day,
+        expires_at__gt=timezone.now(),
+    ).values_list('appointment_time', flat=True)
+
+
+def reap_expired_holds(batch_size=500):
+    """
+    Delete expired holds ``batch_size`` rows at a time and announce their
+    slots as freed, and offer them to the waitlist, unless they have since
+    been booked. Returns the number of holds removed.
+    """
+    reaped = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                SlotHold.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=timezone.now())
+                .order_by('expires_at')[:batch_size]
+            )
+            if not batch:
+                return reaped
+            SlotHold.objects.filter(pk__in=[hold.pk for hold in batch]).delete()
+            freed = _unbooked(batch)
+            transaction.on_commit(lambda: [publish_slot_change(state, None) for state in freed])
+            slots_freed(freed)
+        reaped += len(batch)
+        if len(batch) < batch_size:
+            return reaped
+
+
+def _unbooked(holds):
+    booked = {
+        (doctor_id, day): mask_from_bytes(mask)
+        for doctor_id, day, mask in DoctorDayOccupancy.objects.filter(
+            doctor_id__in={hold.doctor_id for hold in holds},
+            date__in={hold.appointment_date for hold in holds},
+        ).values_list('doctor_id', 'date', 'booked_mask')
+    }
+    freed = []
+    for hold in holds:
+        tick = time_to_tick(hold.appointment_time)
+        mask = booked.get((hold.doctor_id, hold.appointment_date), 0)
+        if tick is None or not (mask >> tick) & 1:
+            freed.append(hold.slot_state())
+    return freed
+
+
+def reap_expired_holds_if_due():
+    """
+    Run reap_expired_holds at most once per SLOT_HOLD_REAP_INTERVAL seconds
+    in this process. Cheap enough to call from request handlers.
+    """
+    global _last_reap
+    interval = getattr(settings, 'SLOT_HOLD_REAP_INTERVAL', 60)
+    now = time.monotonic()
+    with _reap_lock:
+        if _last_reap is not None and now - _last_reap < interval:
+            return 0
+        _last_reap = now
+    return reap_expired_holds()
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from appointments.models import Appointment, Patient
+from appointments.patients import recount_patients
+
+
+class Command(BaseCommand):
+    help = (
+        'Link appointments without a patient to Patient rows, creating them by '
+        'national number, a batch at a time. With --recount, also recompute '
+        'every patient\'s stored counters from their appointments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--recount', action='store_true', help='Recompute counters of all patients.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        linked = 0
+        last_pk = None
+        while True:
+            rows = (
+                Appointment.objects.filter(patient__isnull=True)
+                .exclude(contact_suffix='')
+                .order_by('pk')
+                .values_list('pk', 'contact_suffix', 'patient_name')
+            )
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            batch = list(rows[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            with transaction.atomic():
+                # New patients take a name from one of their appointments;
+                # later bookings keep it current.
+                names = {contact: name for _, contact, name in batch}
+                Patient.objects.bulk_create(
+                    [Patient(contact=contact, name=name) for contact, name in names.items()],
+                    ignore_conflicts=True,
+                )
+                patient_ids = dict(
+                    Patient.objects.filter(contact__in=names).values_list('contact', 'pk')
+                )
+                Appointment.objects.bulk_update(
+                    [Appointment(pk=pk, patient_id=patient_ids[contact]) for pk, contact, _ in batch],
+                    ['patient'],
+                )
+                # The links bypass the write hooks; count these patients afresh.
+                recount_patients(list(patient_ids.values()))
+            linked += len(batch)
+            self.stdout.write(f'Linked {linked} appointments')
+
+        recounted = 0
+        if options['recount']:
+            last_pk = None
+            while True:
+                ids = Patient.objects.order_by('pk').values_list('pk', flat=True)
+                if last_pk is not None:
+                    ids = ids.filter(pk__gt=last_pk)
+                ids = list(ids[:batch_size])
+                if not ids:
+                    break
+                last_pk = ids[-1]
+                recounted += recount_patients(ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Linked {linked} appointments; recounted {recounted} patients'
+        ))
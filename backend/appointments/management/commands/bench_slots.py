@@ -0,0 +1,85 @@
+import random
+import time
+from datetime import time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from doctors.slots import DEFAULT_GRID
+
+
+def legacy_available(booked_times):
+    # The string scan AvailableTimeSlotsView used before the bitmask grid.
+    all_slots = []
+    for hour in range(9, 17):
+        all_slots.append(f"{hour:02d}:00")
+        all_slots.append(f"{hour:02d}:30")
+    booked_slots = [t.strftime("%H:%M") for t in booked_times]
+    return [slot for slot in all_slots if slot not in booked_slots]
+
+
+def legacy_valid(value):
+    # The check AppointmentCreateSerializer.validate_appointment_time used.
+    if value < dt_time(9, 0) or value >= dt_time(17, 0):
+        return False
+    return value.minute in [0, 30]
+
+
+def grid_available(booked_times):
+    return DEFAULT_GRID.labels(DEFAULT_GRID.free(DEFAULT_GRID.mask_of(booked_times)))
+
+
+def grid_valid(value):
+    return value in DEFAULT_GRID
+
+
+class Command(BaseCommand):
+    help = 'Compare the string-scan slot code with the bitmask slot grid.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        slots = DEFAULT_GRID.times(DEFAULT_GRID.mask)
+        days = [
+            rng.sample(slots, rng.randint(0, len(slots)))
+            for _ in range(options['days'])
+        ]
+        candidates = [
+            dt_time(rng.randrange(7, 19), rng.choice((0, 15, 30, 45)))
+            for _ in range(options['days'])
+        ]
+
+        cases = [
+            ('available slots', legacy_available, grid_available, days),
+            ('validate time', legacy_valid, grid_valid, candidates),
+        ]
+        for label, legacy, grid, inputs in cases:
+            legacy_out, legacy_seconds = self.timed(
+                lambda: [legacy(value) for value in inputs], options['repeat']
+            )
+            grid_out, grid_seconds = self.timed(
+                lambda: [grid(value) for value in inputs], options['repeat']
+            )
+            if legacy_out != grid_out:
+                raise CommandError(f'{label}: slot grid output differs from the legacy code')
+
+            size = len(inputs)
+            self.stdout.write(
+                f'{label:<16} {size:>7} calls  '
+                f'legacy {size / legacy_seconds:>11,.0f}/s  '
+                f'grid {size / grid_seconds:>11,.0f}/s  '
+                f'x{legacy_seconds / grid_seconds:.1f}'
+            )
+
+    @staticmethod
+    def timed(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from appointments.holds import reap_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Delete expired slot holds in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        reaped = reap_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reaped {reaped} expired holds'))
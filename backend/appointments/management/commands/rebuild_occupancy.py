@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from appointments.derived import add_rebuild_arguments, run_rebuild
+from appointments.occupancy import OCCUPANCY
+
+
+class Command(BaseCommand):
+    help = 'Recompute DoctorDayOccupancy from appointments, or just report drift with --verify.'
+
+    def add_arguments(self, parser):
+        add_rebuild_arguments(parser)
+
+    def handle(self, *args, **options):
+        run_rebuild(self, OCCUPANCY, options)
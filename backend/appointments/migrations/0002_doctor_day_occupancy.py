@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-01-25 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copies of the slot/occupancy encoding at the time of writing.
+ACTIVE_STATUSES = ('pending', 'confirmed')
+TICK_MINUTES = 5
+MASK_BYTES = 36
+
+
+def backfill_occupancy(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    DoctorDayOccupancy = apps.get_model('appointments', 'DoctorDayOccupancy')
+
+    state = {}
+    rows = Appointment.objects.filter(status__in=ACTIVE_STATUSES).values_list(
+        'doctor_id', 'appointment_date', 'appointment_time'
+    )
+    for doctor_id, day, slot in rows.iterator(chunk_size=5000):
+        mask, count = state.get((doctor_id, day), (0, 0))
+        if not slot.second and not slot.microsecond and slot.minute % TICK_MINUTES == 0:
+            mask |= 1 << ((slot.hour * 60 + slot.minute) // TICK_MINUTES)
+        state[doctor_id, day] = (mask, count + 1)
+
+    DoctorDayOccupancy.objects.bulk_create(
+        [
+            DoctorDayOccupancy(
+                doctor_id=doctor_id,
+                date=day,
+                booked_mask=mask.to_bytes(MASK_BYTES, 'little'),
+                booked_count=count,
+            )
+            for (doctor_id, day), (mask, count) in state.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+        ('doctors', '0007_doctor_schedules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorDayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_mask', models.BinaryField(default=b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')),
+                ('booked_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'appointments_doctor_day_occupancy',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='appointment',
+            name='unique_doctor_appointment_slot',
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'confirmed'))), fields=('doctor', 'appointment_date', 'appointment_time'), name='unique_doctor_appointment_slot'),
+        ),
+        migrations.AddField(
+            model_name='doctordayoccupancy',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_occupancy', to='doctors.doctor'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctordayoccupancy',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date'), name='unique_doctor_day_occupancy'),
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-01-26 11:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_doctor_day_occupancy'),
+        ('doctors', '0007_doctor_schedules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('client', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='doctors.doctor')),
+            ],
+            options={
+                'db_table': 'appointments_slot_hold',
+                'indexes': [models.Index(fields=['client', 'expires_at'], name='slot_hold_client_idx')],
+                'constraints': [models.UniqueConstraint(fields=('doctor', 'appointment_date', 'appointment_time'), name='unique_doctor_slot_hold')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-01-27 10:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_slot_hold'),
+        ('doctors', '0008_doctor_timezone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('appointment_date', models.DateField()),
+                ('consultation_type', models.CharField(choices=[('online', 'Online'), ('in-person', 'In-Person')], max_length=20)),
+                ('patient_name', models.CharField(max_length=255)),
+                ('patient_contact', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('left', 'Left')], default='waiting', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True)),
+                ('appointment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='appointments.appointment')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='doctors.doctor')),
+            ],
+            options={
+                'db_table': 'appointments_waitlist_entry',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['doctor', 'appointment_date', 'status', 'created_at'], name='waitlist_queue_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('doctor', 'appointment_date', 'consultation_type', 'patient_contact'), name='unique_waiting_patient')],
+            },
+        ),
+    ]
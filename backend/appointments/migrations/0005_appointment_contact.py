@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-01-27 15:30
+
+from django.db import migrations, models
+
+
+# Frozen copy of contacts.normalize_contact at the time of writing.
+SUFFIX_DIGITS = 10
+
+
+def normalize_contact(value):
+    value = (value or '').strip().replace('(0)', '')
+    digits = ''.join(ch for ch in value if '0' <= ch <= '9')
+    if value.startswith('00'):
+        digits = digits[2:]
+    elif not value.startswith('+') and digits.startswith('0'):
+        digits = digits[1:]
+    return digits
+
+
+def backfill_contacts(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+
+    batch = []
+    rows = Appointment.objects.only('pk', 'patient_contact').order_by('pk')
+    for appointment in rows.iterator(chunk_size=5000):
+        appointment.contact_normalized = normalize_contact(appointment.patient_contact)
+        appointment.contact_suffix = appointment.contact_normalized[-SUFFIX_DIGITS:]
+        batch.append(appointment)
+        if len(batch) == 5000:
+            Appointment.objects.bulk_update(batch, ['contact_normalized', 'contact_suffix'])
+            batch = []
+    Appointment.objects.bulk_update(batch, ['contact_normalized', 'contact_suffix'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_waitlist_entry'),
+        ('doctors', '0008_doctor_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='contact_normalized',
+            field=models.CharField(default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='contact_suffix',
+            field=models.CharField(default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(backfill_contacts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['contact_suffix', 'appointment_date', 'appointment_time'], name='appointment_contact_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-01-28 09:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_contact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Patient',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('contact', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('total_appointments', models.PositiveIntegerField(default=0)),
+                ('cancelled_appointments', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'appointments_patient',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.patient'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-01-28 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_patient'),
+        ('doctors', '0008_doctor_timezone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['created_at', 'id'], name='appt_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'created_at', 'id'], name='appt_doctor_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'status', 'created_at', 'id'], name='appt_doctor_status_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'appointment_date', 'created_at', 'id'], name='appt_doctor_date_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='appt_status_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['appointment_date', 'status', 'created_at', 'id'], name='appt_date_status_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appointment_doctor__4d4b79_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appointment_appoint_fb412a_idx',
+        ),
+    ]
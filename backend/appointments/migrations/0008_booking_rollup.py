@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-01-29 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractHour
+
+
+def backfill_rollups(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    BookingRollup = apps.get_model('appointments', 'BookingRollup')
+
+    state = {}
+    rows = (
+        Appointment.objects.order_by()
+        .annotate(hour=ExtractHour('appointment_time'))
+        .values_list('doctor_id', 'appointment_date', 'status', 'consultation_type', 'hour')
+        .annotate(n=Count('pk'))
+    )
+    for doctor_id, day, status, consultation_type, hour, n in rows.iterator(chunk_size=5000):
+        entry = state.setdefault((doctor_id, day, status, consultation_type), [0, [0] * 24])
+        entry[0] += n
+        entry[1][hour] += n
+
+    BookingRollup.objects.bulk_create(
+        [
+            BookingRollup(
+                doctor_id=doctor_id,
+                date=day,
+                status=status,
+                consultation_type=consultation_type,
+                count=count,
+                hour_counts=hours,
+            )
+            for (doctor_id, day, status, consultation_type), (count, hours) in state.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_admin_keyset_indexes'),
+        ('doctors', '0008_doctor_timezone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('consultation_type', models.CharField(choices=[('online', 'Online'), ('in-person', 'In-Person')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hour_counts', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='doctors.doctor')),
+            ],
+            options={
+                'db_table': 'appointments_booking_rollup',
+                'indexes': [models.Index(fields=['date'], name='booking_rollup_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('doctor', 'date', 'status', 'consultation_type'), name='unique_booking_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
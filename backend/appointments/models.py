@@ -1,7 +1,68 @@
 import uuid
-from django.db import models
+from collections import namedtuple
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from doctors.models import Doctor
+from doctors.slots import MASK_BYTES
+
+from .contacts import contact_columns
+
+# Statuses that occupy a slot.
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# Columns that derived tables (occupancy, patient counters, ...) depend on.
+TRACKED_FIELDS = (
+    'doctor_id',
+    'appointment_date',
+    'appointment_time',
+    'status',
+    'consultation_type',
+    'contact_normalized',
+    'patient_id',
+)
+# Marks an instance loaded without some of TRACKED_FIELDS.
+DEFERRED_STATE = object()
+
+
+class AppointmentState(namedtuple('AppointmentState', TRACKED_FIELDS)):
+    """Snapshot of an appointment's TRACKED_FIELDS; see Appointment.tracked_state."""
+
+    __slots__ = ()
+
+    def slot(self):
+        """``(doctor_id, date, time)`` while the appointment holds its slot, else None."""
+        if self.status not in ACTIVE_STATUSES:
+            return None
+        return (self.doctor_id, self.appointment_date, self.appointment_time)
+
+
+class Patient(models.Model):
+    """
+    A person booking appointments, deduplicated by national number
+    (Appointment.contact_suffix, see contacts.py). The counters follow
+    Appointment writes; the upcoming count depends on the date, so
+    patients.with_upcoming derives it at read time instead.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    contact = models.CharField(max_length=20, unique=True)
+    # As given on the latest booking.
+    name = models.CharField(max_length=255)
+
+    total_appointments = models.PositiveIntegerField(default=0)
+    cancelled_appointments = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'appointments_patient'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.contact})"
+
 
 class Appointment(models.Model):
     
@@ -25,6 +86,17 @@ class Appointment(models.Model):
     
     patient_name = models.CharField(max_length=255)
     patient_contact = models.CharField(max_length=20)
+    # Derived from patient_contact on save; see contacts.py.
+    contact_normalized = models.CharField(max_length=20, default='', editable=False)
+    contact_suffix = models.CharField(max_length=10, default='', editable=False)
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='appointments'
+    )
     
     consultation_type = models.CharField(
         max_length=20,
@@ -40,34 +112,276 @@ class Appointment(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # tracked_state() as last loaded or saved; None until the row exists.
+    _loaded_state = None
     
     class Meta:
         db_table = 'appointments_appointment'
         ordering = ['-appointment_date', '-appointment_time']
         
         constraints = [
+            # Cancelled appointments give their slot back.
             models.UniqueConstraint(
                 fields=['doctor', 'appointment_date', 'appointment_time'],
+                condition=Q(status__in=ACTIVE_STATUSES),
                 name='unique_doctor_appointment_slot'
             )
         ]
         
         indexes = [
-            models.Index(fields=['doctor', 'appointment_date']),
-            models.Index(fields=['appointment_date', 'status']),
+            # The admin list pages newest-first on (created_at, id) under
+            # any mix of doctor / date / status filters; each index below
+            # serves one mix. The date ones double as plain
+            # (doctor, date) and (date, status) lookups.
+            models.Index(fields=['created_at', 'id'], name='appt_created_keyset_idx'),
+            models.Index(fields=['doctor', 'created_at', 'id'], name='appt_doctor_keyset_idx'),
+            models.Index(
+                fields=['doctor', 'status', 'created_at', 'id'],
+                name='appt_doctor_status_keyset_idx'
+            ),
+            models.Index(
+                fields=['doctor', 'appointment_date', 'created_at', 'id'],
+                name='appt_doctor_date_keyset_idx'
+            ),
+            models.Index(fields=['status', 'created_at', 'id'], name='appt_status_keyset_idx'),
+            models.Index(
+                fields=['appointment_date', 'status', 'created_at', 'id'],
+                name='appt_date_status_keyset_idx'
+            ),
+            # "My appointments": one patient's rows, already in list order.
+            models.Index(
+                fields=['contact_suffix', 'appointment_date', 'appointment_time'],
+                name='appointment_contact_idx'
+            ),
         ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(TRACKED_FIELDS).issubset(field_names):
+            instance._loaded_state = instance.tracked_state()
+        else:
+            # Reading deferred fields here would recurse through
+            # refresh_from_db(); look the state up on first write instead.
+            instance._loaded_state = DEFERRED_STATE
+        return instance
+
+    def tracked_state(self):
+        return AppointmentState(*(getattr(self, name) for name in TRACKED_FIELDS))
+
+    def slot_state(self):
+        """``(doctor_id, date, time)`` while the appointment holds its slot, else None."""
+        return self.tracked_state().slot()
+
+    def loaded_state(self):
+        """tracked_state() as stored in the database before this write."""
+        if self._loaded_state is DEFERRED_STATE:
+            row = type(self)._base_manager.filter(pk=self.pk).values_list(*TRACKED_FIELDS).first()
+            self._loaded_state = AppointmentState(*row) if row is not None else None
+        return self._loaded_state
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'patient_contact' in update_fields:
+            self.contact_normalized, self.contact_suffix = contact_columns(self.patient_contact)
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'contact_normalized', 'contact_suffix', 'patient'
+                }
+        # Receivers (occupancy, patients, ...) must commit or roll back
+        # together with the row itself.
+        with transaction.atomic():
+            self.loaded_state()
+            super().save(*args, **kwargs)
+        self._loaded_state = self.tracked_state()
+
+    def delete(self, *args, **kwargs):
+        self.loaded_state()
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.patient_name} - Dr. {self.doctor.name} on {self.appointment_date} at {self.appointment_time}"
     
 
     def clean(self):
-        modes = self.doctor.consultation_modes or []
-
-        if self.consultation_type not in modes:
+        if not self.doctor.supports_mode(self.consultation_type):
             raise ValidationError(
                 f"Doctor does not support {self.consultation_type} consultations"
             )
 
         if not self.doctor.is_active:
             raise ValidationError("Doctor is not active")
+
+
+class DoctorDayOccupancy(models.Model):
+    """
+    Booked slots of one doctor on one day, kept in step with Appointment
+    writes (see occupancy.py) so availability reads a single row.
+    ``booked_mask`` is a slots.py tick bitmask stored little-endian.
+    """
+
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='day_occupancy'
+    )
+    date = models.DateField()
+    booked_mask = models.BinaryField(default=bytes(MASK_BYTES))
+    booked_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'appointments_doctor_day_occupancy'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'date'],
+                name='unique_doctor_day_occupancy'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.doctor_id} on {self.date}: {self.booked_count} booked"
+
+
+class SlotHold(models.Model):
+    """
+    A short reservation of one slot while a patient fills in the booking
+    form. Holds past ``expires_at`` are ignored by every read and removed
+    in batches by holds.reap_expired_holds.
+    """
+
+    token = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='slot_holds'
+    )
+    appointment_date = models.DateField()
+    appointment_time = models.TimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    # Who placed the hold (the client address as the API throttles see
+    # it), so each client's live holds can be capped.
+    client = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'appointments_slot_hold'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date', 'appointment_time'],
+                name='unique_doctor_slot_hold'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['client', 'expires_at'], name='slot_hold_client_idx'),
+        ]
+
+    def __str__(self):
+        return f"Hold on {self.doctor_id} {self.appointment_date} {self.appointment_time} until {self.expires_at}"
+
+    def slot_state(self):
+        return (self.doctor_id, self.appointment_date, self.appointment_time)
+
+
+class WaitlistEntry(models.Model):
+    """
+    A patient queued for a fully booked doctor-day. Each (doctor, date,
+    consultation_type) is a FIFO queue; when a slot on that day frees up,
+    the oldest waiting entry for the day is booked into it (see
+    waitlist.promote_waitlist).
+    """
+
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('left', 'Left'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    appointment_date = models.DateField()
+    consultation_type = models.CharField(
+        max_length=20,
+        choices=Appointment.CONSULTATION_TYPES
+    )
+
+    patient_name = models.CharField(max_length=255)
+    patient_contact = models.CharField(max_length=20)
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='waiting'
+    )
+    # The booking made on promotion.
+    appointment = models.OneToOneField(
+        Appointment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'appointments_waitlist_entry'
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date', 'consultation_type', 'patient_contact'],
+                condition=Q(status='waiting'),
+                name='unique_waiting_patient'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['doctor', 'appointment_date', 'status', 'created_at'],
+                name='waitlist_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_name} waiting for {self.doctor_id} on {self.appointment_date}"
+
+
+class BookingRollup(models.Model):
+    """
+    Appointments of one doctor on one day in one (status, consultation
+    type), kept in step with Appointment writes by rollups.py so analytics
+    read these rows instead of appointments. ``hour_counts`` splits
+    ``count`` by the hour of appointment_time (24 entries).
+    """
+
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='booking_rollups'
+    )
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    consultation_type = models.CharField(max_length=20, choices=Appointment.CONSULTATION_TYPES)
+    count = models.PositiveIntegerField(default=0)
+    hour_counts = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'appointments_booking_rollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'date', 'status', 'consultation_type'],
+                name='unique_booking_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='booking_rollup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor_id} on {self.date}: {self.count} {self.status} {self.consultation_type}"
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from doctors.slots import mask_from_bytes, mask_to_bytes, time_to_tick
+
+from .derived import DerivedTable, apply_changes, locked_row
+from .models import ACTIVE_STATUSES, DoctorDayOccupancy
+
+
+def _bit(slot):
+    tick = time_to_tick(slot)
+    return 0 if tick is None else 1 << tick
+
+
+def _adjust(key, slot, delta):
+    doctor_id, day = key
+    occupancy = locked_row(DoctorDayOccupancy, delta > 0, doctor_id=doctor_id, date=day)
+    if occupancy is None:
+        return
+    mask = mask_from_bytes(occupancy.booked_mask)
+    if delta > 0:
+        mask |= _bit(slot)
+    else:
+        mask &= ~_bit(slot)
+    occupancy.booked_mask = mask_to_bytes(mask)
+    occupancy.booked_count = max(0, occupancy.booked_count + delta)
+    occupancy.save(update_fields=['booked_mask', 'booked_count', 'updated_at'])
+
+
+def apply_slot_change(before, after):
+    """
+    Move occupancy from slot ``before`` to slot ``after``; either may be
+    None (see Appointment.slot_state). Must run inside the transaction
+    that wrote the appointment.
+    """
+    if before == after:
+        return
+    changes = []
+    if before is not None:
+        doctor_id, day, slot = before
+        changes.append(((doctor_id, day), slot, -1))
+    if after is not None:
+        doctor_id, day, slot = after
+        changes.append(((doctor_id, day), slot, 1))
+    apply_changes(changes, _adjust)
+
+
+def booked_mask(doctor_id, day):
+    """Booked-slot bitmask of one doctor on ``day`` from its occupancy row."""
+    value = (
+        DoctorDayOccupancy.objects.filter(doctor_id=doctor_id, date=day)
+        .values_list('booked_mask', flat=True)
+        .first()
+    )
+    return mask_from_bytes(value)
+
+
+def compute_occupancy(appointments):
+    """
+    ``{(doctor_id, date): (mask, count)}`` recomputed from the active rows
+    of an Appointment queryset.
+    """
+    state = defaultdict(lambda: [0, 0])
+    rows = appointments.filter(status__in=ACTIVE_STATUSES).values_list(
+        'doctor_id', 'appointment_date', 'appointment_time'
+    )
+    for doctor_id, day, slot in rows.iterator(chunk_size=5000):
+        entry = state[doctor_id, day]
+        entry[0] |= _bit(slot)
+        entry[1] += 1
+    return {key: tuple(value) for key, value in state.items()}
+
+
+def _occupancy_value(row):
+    return (mask_from_bytes(row.booked_mask), row.booked_count)
+
+
+def _set_occupancy(row, value):
+    mask, row.booked_count = value
+    row.booked_mask = mask_to_bytes(mask)
+    return row
+
+
+OCCUPANCY = DerivedTable(
+    model=DoctorDayOccupancy,
+    label='occupancy',
+    key_fields=('doctor_id', 'date'),
+    value_fields=['booked_mask', 'booked_count'],
+    compute=compute_occupancy,
+    value_of=_occupancy_value,
+    set_value=_set_occupancy,
+    describe=lambda value: f'{value[1]} booked',
+    empty=(0, 0),
+)
@@ -0,0 +1,13 @@
+from doctors.pagination import OptInKeysetPagination
+
+
+class AdminAppointmentPagination(OptInKeysetPagination):
+    """
+    Keyset pagination for the admin appointment list, newest booking
+    first. Every filter combination the view accepts has an index ending
+    in (created_at, id), so each page is an index range scan.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    legacy_setting = 'ADMIN_APPOINTMENT_LIST_LEGACY_UNPAGINATED'
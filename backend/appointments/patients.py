@@ -0,0 +1,118 @@
+"""
+Patient records and their appointment counters.
+
+Appointment writes reach apply_patient_change through
+signals.appointment_changed, which moves each affected patient's total
+and cancelled counters with one ``UPDATE ... SET n = n + delta``.
+Whether an appointment is upcoming changes with the clock rather than
+with writes, so that count is not stored: with_upcoming derives it when
+patients are read. recount_patients (``backfill_patients --recount``)
+re-derives the stored counters if they are ever suspected of drift.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from doctors.models import Doctor
+
+from .contacts import contact_suffix
+from .models import ACTIVE_STATUSES, Appointment, Patient
+from .zones import clinic_today
+
+COUNTERS = ('total_appointments', 'cancelled_appointments')
+
+
+def patient_for(contact, name):
+    """
+    Id of the patient for normalized ``contact``, created on first sight;
+    None for an empty contact. Patients are keyed by the national number
+    (contacts.contact_suffix), as contact lookups are, so one number with
+    and without its country code is one patient. Keeps the name current.
+    """
+    if not contact:
+        return None
+    patient, created = Patient.objects.get_or_create(
+        contact=contact_suffix(contact), defaults={'name': name}
+    )
+    if not created and patient.name != name:
+        Patient.objects.filter(pk=patient.pk).update(name=name)
+    return patient.pk
+
+
+def _counts(state):
+    """``(total, cancelled)`` one appointment state adds to its patient."""
+    return (1, int(state.status == 'cancelled'))
+
+
+def apply_patient_change(before, after):
+    """
+    Move patient counters for an appointment going from ``before`` to
+    ``after`` (Appointment.tracked_state() values, or None).
+    """
+    deltas = defaultdict(lambda: [0] * len(COUNTERS))
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None or state.patient_id is None:
+            continue
+        delta = deltas[state.patient_id]
+        for index, count in enumerate(_counts(state)):
+            delta[index] += sign * count
+
+    # Fixed order, so two writes touching the same patients cannot deadlock.
+    for patient_id in sorted(deltas, key=str):
+        if any(deltas[patient_id]):
+            # Floored at zero: a counter that has drifted low must not make
+            # the unsigned column reject the appointment write.
+            Patient.objects.filter(pk=patient_id).update(**{
+                name: Greatest(F(name) + delta, 0)
+                for name, delta in zip(COUNTERS, deltas[patient_id])
+            })
+
+
+def upcoming_filter(prefix=''):
+    """
+    Q for active appointments not before their clinic's today, on
+    Appointment fields reached through ``prefix`` (e.g. "appointments__"
+    from Patient). One branch per distinct clinic zone, of which there are
+    few.
+    """
+    zones = Doctor.objects.order_by().values_list('timezone', flat=True).distinct()
+    dated = Q(pk__in=[])
+    for zone in zones:
+        dated |= Q(**{
+            f'{prefix}doctor__timezone': zone,
+            f'{prefix}appointment_date__gte': clinic_today(zone),
+        })
+    return Q(**{f'{prefix}status__in': ACTIVE_STATUSES}) & dated
+
+
+def with_upcoming(patients):
+    """``patients`` annotated with upcoming_appointments as of now."""
+    return patients.annotate(
+        upcoming_appointments=Count('appointments', filter=upcoming_filter('appointments__'))
+    )
+
+
+def recount_patients(patient_ids):
+    """Recompute the stored counters of ``patient_ids`` from their appointments."""
+    with transaction.atomic():
+        # Lock first so incremental updates queue behind the recount
+        # instead of being overwritten by it.
+        patients = list(Patient.objects.select_for_update().filter(pk__in=patient_ids).order_by('pk'))
+        counts = {
+            row['patient_id']: row
+            for row in Appointment.objects.filter(patient_id__in=patient_ids)
+            .values('patient_id')
+            .annotate(
+                total=Count('pk'),
+                cancelled=Count('pk', filter=Q(status='cancelled')),
+            )
+            .order_by()
+        }
+        for patient in patients:
+            row = counts.get(patient.pk, {})
+            patient.total_appointments = row.get('total', 0)
+            patient.cancelled_appointments = row.get('cancelled', 0)
+        Patient.objects.bulk_update(patients, COUNTERS)
+    return len(patients)
@@ -0,0 +1,167 @@
+"""
+Daily booking rollups for analytics.
+
+One BookingRollup row per (doctor, appointment date, status,
+consultation type) counts the appointments in that bucket, split by
+hour. Appointment writes move counts between buckets via
+signals.appointment_changed; rebuild_rollups recomputes them.
+analytics() answers admin range queries from these rows alone.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour
+
+from .derived import DerivedTable, apply_changes, locked_row
+from .models import BookingRollup
+
+HOURS = 24
+
+GROUP_BY = ('day', 'hour', 'doctor', 'specialization')
+ANALYTICS_FIELDS = ('total', 'pending', 'confirmed', 'cancelled')
+
+
+def rollup_key(state):
+    """``(doctor_id, date, status, consultation_type)`` of an Appointment.tracked_state()."""
+    return (state.doctor_id, state.appointment_date, state.status, state.consultation_type)
+
+
+def _adjust(key, hour, delta):
+    doctor_id, day, status, consultation_type = key
+    rollup = locked_row(
+        BookingRollup,
+        delta > 0,
+        doctor_id=doctor_id,
+        date=day,
+        status=status,
+        consultation_type=consultation_type,
+    )
+    if rollup is None:
+        return
+    hours = list(rollup.hour_counts) or [0] * HOURS
+    hours[hour] = max(0, hours[hour] + delta)
+    rollup.hour_counts = hours
+    rollup.count = max(0, rollup.count + delta)
+    rollup.save(update_fields=['count', 'hour_counts', 'updated_at'])
+
+
+def apply_rollup_change(before, after):
+    """
+    Move one appointment between rollup buckets; ``before`` and ``after``
+    are Appointment.tracked_state() values or None.
+    """
+    changes = []
+    if before is not None:
+        changes.append((rollup_key(before), before.appointment_time.hour, -1))
+    if after is not None:
+        changes.append((rollup_key(after), after.appointment_time.hour, 1))
+    if len(changes) == 2 and changes[0][:2] == changes[1][:2]:
+        return
+    apply_changes(changes, _adjust)
+
+
+def compute_rollups(appointments):
+    """
+    ``{key: (count, hour_counts)}`` recomputed from an Appointment
+    queryset, grouped by the database.
+    """
+    state = defaultdict(lambda: [0, [0] * HOURS])
+    rows = (
+        appointments.order_by()
+        .annotate(hour=ExtractHour('appointment_time'))
+        .values_list('doctor_id', 'appointment_date', 'status', 'consultation_type', 'hour')
+        .annotate(n=Count('pk'))
+    )
+    for doctor_id, day, status, consultation_type, hour, n in rows.iterator(chunk_size=5000):
+        entry = state[doctor_id, day, status, consultation_type]
+        entry[0] += n
+        entry[1][hour] += n
+    return {key: tuple(value) for key, value in state.items()}
+
+
+def _rollup_value(row):
+    return (row.count, list(row.hour_counts) or [0] * HOURS)
+
+
+def _set_rollup(row, value):
+    row.count, row.hour_counts = value
+    return row
+
+
+ROLLUPS = DerivedTable(
+    model=BookingRollup,
+    label='rollups',
+    key_fields=('doctor_id', 'date', 'status', 'consultation_type'),
+    value_fields=['count', 'hour_counts'],
+    compute=compute_rollups,
+    value_of=_rollup_value,
+    set_value=_set_rollup,
+    describe=lambda value: f'{value[0]} appointments',
+    empty=(0, [0] * HOURS),
+)
+
+
+def analytics(start, end, group_by='day', doctor_id=None, specialization=None, consultation_type=None):
+    """
+    Appointment counts for appointment dates ``start``..``end`` (inclusive),
+    one row per ``group_by`` value. Reads BookingRollup only.
+    """
+    rollups = BookingRollup.objects.filter(date__range=(start, end)).order_by()
+    if doctor_id:
+        rollups = rollups.filter(doctor_id=doctor_id)
+    if specialization:
+        rollups = rollups.filter(doctor__specialization__iexact=specialization)
+    if consultation_type:
+        rollups = rollups.filter(consultation_type=consultation_type)
+
+    if group_by == 'hour':
+        # Hours live in a JSON list per row; summing them here keeps the
+        # query portable and reads at most one row per bucket.
+        by_hour = [dict.fromkeys(ANALYTICS_FIELDS, 0) for _ in range(HOURS)]
+        for status, hours in rollups.values_list('status', 'hour_counts').iterator(chunk_size=5000):
+            for hour, n in enumerate(hours):
+                by_hour[hour]['total'] += n
+                if status in ANALYTICS_FIELDS:
+                    by_hour[hour][status] += n
+        return [{'hour': hour, **counts} for hour, counts in enumerate(by_hour)]
+
+    counts = {
+        'total': Sum('count', default=0),
+        **{status: Sum('count', filter=Q(status=status), default=0) for status in ANALYTICS_FIELDS[1:]},
+    }
+    if group_by == 'doctor':
+        rows = rollups.values('doctor_id', 'doctor__name', 'doctor__specialization').annotate(**counts)
+        return sorted(
+            (
+                {
+                    'doctor_id': str(row['doctor_id']),
+                    'doctor_name': row['doctor__name'],
+                    'specialization': row['doctor__specialization'],
+                    **{name: row[name] for name in ANALYTICS_FIELDS},
+                }
+                for row in rows
+            ),
+            key=lambda item: item['doctor_name'],
+        )
+    if group_by == 'specialization':
+        rows = rollups.values('doctor__specialization').annotate(**counts)
+        return sorted(
+            (
+                {
+                    'specialization': row['doctor__specialization'],
+                    **{name: row[name] for name in ANALYTICS_FIELDS},
+                }
+                for row in rows
+            ),
+            key=lambda item: item['specialization'],
+        )
+
+    by_day = {row['date']: row for row in rollups.values('date').annotate(**counts)}
+    return [
+        {
+            'date': day.isoformat(),
+            **{name: by_day.get(day, {}).get(name, 0) for name in ANALYTICS_FIELDS},
+        }
+        for day in (start + timedelta(days=n) for n in range((end - start).days + 1))
+    ]
@@ -1,11 +1,97 @@
 from rest_framework import serializers
-from django.utils import timezone
-from datetime import datetime, time
-from .models import Appointment
+from datetime import datetime
+from .availability import open_slots
+from .booking import BOOKING_ERRORS, SLOT_TAKEN, book_appointment
+from .holds import place_hold
+from .models import Appointment, SlotHold, WaitlistEntry
+from .occupancy import booked_mask
+from .waitlist import join_waitlist, waitlist_position
+from .zones import clinic_today, default_zone_name, is_valid_zone, past_mask
+from doctors.profile_cache import get_profile
+from doctors.schedules import get_day_grid
 from doctors.serializers import DoctorListSerializer
+from doctors.slots import time_to_tick
+
+def validate_contact(value):
+    
+    cleaned = value.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    
+    if len(cleaned) < 10:
+        raise serializers.ValidationError("Please provide a valid contact number")
+    
+    return value
+
+
+class SlotSerializerMixin:
+    """
+    Validation shared by anything that claims a slot: ``doctor``,
+    ``appointment_date`` and ``appointment_time`` must name a slot on the
+    doctor's schedule. ``doctor`` is declared by each serializer as a
+    UUIDField, validated against the doctor profile cache instead of
+    loading the row.
+    """
+
+    def validate_doctor(self, value):
+        profile = get_profile(value)
+        if profile is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        self.doctor_id = value
+        self.doctor_profile = profile
+        return value
+
+    def clinic_zone(self):
+        profile = getattr(self, 'doctor_profile', None)
+        return profile.timezone if profile is not None else default_zone_name()
+
+    def validate_appointment_date(self, value):
+        
+        if value < clinic_today(self.clinic_zone()):
+            raise serializers.ValidationError("Cannot book appointments in the past")
+        return value
+
+    def validate_slot(self, data):
+        doctor = self.doctor_profile
+
+        if not doctor.is_active:
+            raise serializers.ValidationError({
+                'doctor': "This doctor is currently not available for appointments"
+            })
+
+        grid = get_day_grid(self.doctor_id, data['appointment_date'])
+        appointment_time = data.get('appointment_time')
+
+        if not len(grid):
+            raise serializers.ValidationError({
+                'appointment_date': f"Dr. {doctor.name} is not available on this date"
+            })
+
+        if not grid.within_hours(appointment_time):
+            raise serializers.ValidationError({
+                'appointment_time': f"Appointments available {grid.hours_label()} only"
+            })
 
-class AppointmentCreateSerializer(serializers.ModelSerializer):
+        if appointment_time not in grid:
+            examples = ", ".join(grid.labels(grid.mask)[:2])
+            raise serializers.ValidationError({
+                'appointment_time': f"Please choose one of the doctor's slot times (e.g., {examples})"
+            })
+
+        tick = time_to_tick(appointment_time)
+        if (past_mask(self.clinic_zone(), data['appointment_date']) >> tick) & 1:
+            raise serializers.ValidationError({
+                'appointment_time': "Cannot book appointments in the past"
+            })
+
+
+class AppointmentCreateSerializer(SlotSerializerMixin, serializers.ModelSerializer):
     
+    doctor = serializers.UUIDField()
+    # Token from a slot hold (see SlotHoldSerializer); required to book a
+    # slot that is currently held.
+    hold_token = serializers.UUIDField(required=False, write_only=True)
+    # Optional IANA zone the patient is in; the response then also gives
+    # the appointment start in that zone.
+    client_timezone = serializers.CharField(required=False, write_only=True)
     
     class Meta:
         model = Appointment
@@ -15,51 +101,161 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
             'patient_contact',
             'consultation_type',
             'appointment_date',
-            'appointment_time'
+            'appointment_time',
+            'hold_token',
+            'client_timezone',
         ]
     
-    def validate_appointment_date(self, value):
-        
-        if value < timezone.now().date():
-            raise serializers.ValidationError("Cannot book appointments in the past")
-        return value
-    
-    def validate_appointment_time(self, value):
-        
-        if value < time(9, 0) or value >= time(17, 0):
-            raise serializers.ValidationError("Appointments available between 9 AM and 5 PM only")
-        
-        if value.minute not in [0, 30]:
-            raise serializers.ValidationError("Appointments must be on 30-minute intervals (e.g., 9:00, 9:30)")
-        
+    def validate_client_timezone(self, value):
+        if not is_valid_zone(value):
+            raise serializers.ValidationError(f"Unknown time zone: {value}")
         return value
-    
+
     def validate_patient_contact(self, value):
-       
-        cleaned = value.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        
-        if len(cleaned) < 10:
-            raise serializers.ValidationError("Please provide a valid contact number")
-        
-        return value
+        return validate_contact(value)
     
     def validate(self, data):
        
-        doctor = data.get('doctor')
+        doctor = self.doctor_profile
         consultation_type = data.get('consultation_type')
         
-        if consultation_type not in doctor.consultation_modes:
+        if not doctor.supports_mode(consultation_type):
             raise serializers.ValidationError({
                 'consultation_type': f"Dr. {doctor.name} does not offer {consultation_type} consultations"
             })
+
+        self.validate_slot(data)
         
+        return data
+
+    def book(self):
+        """
+        Book the validated slot through the booking engine. Holds and the
+        slot itself are settled there, atomically with the insert.
+        """
+        data = self.validated_data
+        return book_appointment(
+            self.doctor_profile,
+            patient_name=data['patient_name'],
+            patient_contact=data['patient_contact'],
+            consultation_type=data['consultation_type'],
+            appointment_date=data['appointment_date'],
+            appointment_time=data['appointment_time'],
+            hold_token=data.get('hold_token'),
+        )
+
+    def create(self, validated_data):
+        result = self.book()
+        if not result.booked:
+            raise serializers.ValidationError({'appointment_time': BOOKING_ERRORS[result.reason]})
+        return result.appointment
+
+
+class SlotHoldSerializer(SlotSerializerMixin, serializers.ModelSerializer):
+
+    doctor = serializers.UUIDField(source='doctor_id')
+
+    class Meta:
+        model = SlotHold
+        fields = [
+            'token',
+            'doctor',
+            'appointment_date',
+            'appointment_time',
+            'expires_at',
+        ]
+        read_only_fields = ['token', 'expires_at']
+        # Conflicts are settled by the insert, not by a pre-check query.
+        validators = []
+
+    def validate(self, data):
+        self.validate_slot(data)
+
+        tick = time_to_tick(data['appointment_time'])
+        if (booked_mask(self.doctor_id, data['appointment_date']) >> tick) & 1:
+            raise serializers.ValidationError({'appointment_time': BOOKING_ERRORS[SLOT_TAKEN]})
+
+        return data
+
+    def create(self, validated_data):
+        hold = place_hold(
+            validated_data['doctor_id'],
+            validated_data['appointment_date'],
+            validated_data['appointment_time'],
+            client=self.context.get('client', ''),
+        )
+        if hold is None:
+            raise serializers.ValidationError({'appointment_time': BOOKING_ERRORS[SLOT_TAKEN]})
+        return hold
+
+class WaitlistEntrySerializer(SlotSerializerMixin, serializers.ModelSerializer):
+
+    doctor = serializers.UUIDField(source='doctor_id')
+    position = serializers.SerializerMethodField()
+    appointment = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id',
+            'doctor',
+            'appointment_date',
+            'consultation_type',
+            'patient_name',
+            'patient_contact',
+            'status',
+            'position',
+            'appointment',
+            'created_at',
+        ]
+        read_only_fields = ['status', 'created_at']
+        # A duplicate entry is caught by the insert.
+        validators = []
+
+    def validate_patient_contact(self, value):
+        return validate_contact(value)
+
+    def validate(self, data):
+        doctor = self.doctor_profile
+        day = data['appointment_date']
+        consultation_type = data['consultation_type']
+
         if not doctor.is_active:
             raise serializers.ValidationError({
                 'doctor': "This doctor is currently not available for appointments"
             })
-        
+
+        if not doctor.supports_mode(consultation_type):
+            raise serializers.ValidationError({
+                'consultation_type': f"Dr. {doctor.name} does not offer {consultation_type} consultations"
+            })
+
+        if not len(get_day_grid(self.doctor_id, day)):
+            raise serializers.ValidationError({
+                'appointment_date': f"Dr. {doctor.name} is not available on this date"
+            })
+
+        free, _ = open_slots(self.doctor_id, day)
+        if free:
+            raise serializers.ValidationError({
+                'appointment_date': "Slots are still available on this date. Please book one instead."
+            })
+
         return data
 
+    def get_position(self, obj):
+        return waitlist_position(obj)
+
+    def create(self, validated_data):
+        return join_waitlist(
+            validated_data['doctor_id'],
+            validated_data['appointment_date'],
+            validated_data['consultation_type'],
+            validated_data['patient_name'],
+            validated_data['patient_contact'],
+        )
+
+
 class AppointmentDetailSerializer(serializers.ModelSerializer):
     
     
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .events import publish_slot_change
+from .models import Appointment
+from .occupancy import apply_slot_change
+from .patients import apply_patient_change, patient_for
+from .rollups import apply_rollup_change
+from .stats import invalidate_stats
+
+
+def slot_changed(before, after):
+    """
+    Occupancy and slot events for an appointment moving between slot
+    states (see Appointment.slot_state). Runs inside the writing transaction.
+    """
+    apply_slot_change(before, after)
+    if before != after:
+        transaction.on_commit(lambda: publish_slot_change(before, after))
+        slots_freed([before])
+
+
+def slots_freed(freed):
+    """
+    Offer slot states given up by an appointment or a hold to the
+    waitlist once the writing transaction commits. Promotion runs in its
+    own transaction, after cascading deletes have settled, and a failure
+    there does not undo the write that freed the slots.
+    """
+    freed = [state for state in freed if state is not None]
+    if freed:
+        transaction.on_commit(lambda: _promote(freed), robust=True)
+
+
+def _promote(freed):
+    # The waitlist books through booking.py, which imports this module.
+    from .waitlist import promote_waitlist
+
+    promote_waitlist(freed)
+
+
+def appointment_changed(before, after):
+    """
+    Single hook for appointment writes. ``before`` and ``after`` are
+    Appointment.tracked_state() values, None where the row does not exist.
+    Runs inside the writing transaction.
+    """
+    slot_changed(before and before.slot(), after and after.slot())
+    apply_patient_change(before, after)
+    apply_rollup_change(before, after)
+    if before != after:
+        transaction.on_commit(invalidate_stats)
+
+
+@receiver(pre_save, sender=Appointment)
+def link_patient(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'patient' not in update_fields):
+        return
+    loaded = instance.loaded_state()
+    if instance.patient_id is None or (
+        loaded is not None and loaded.contact_normalized != instance.contact_normalized
+    ):
+        instance.patient_id = patient_for(instance.contact_normalized, instance.patient_name)
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, **kwargs):
+    # Runs inside Appointment.save()'s transaction.
+    appointment_changed(instance.loaded_state(), instance.tracked_state())
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    appointment_changed(instance.loaded_state(), None)
@@ -0,0 +1,135 @@
+"""
+Admin dashboard counts.
+
+Everything comes from one query: a conditional aggregate over all
+appointments, or, when breakdowns are asked for, the same counts grouped
+by doctor / specialization / day with the totals summed from the groups.
+Results are cached for APPOINTMENT_STATS_TTL seconds and dropped on every
+appointment write (see signals.appointment_changed).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Count, DateField, F, Q, When
+
+from doctors.cache import VersionedCache
+
+from .models import ACTIVE_STATUSES, Appointment
+from .zones import clinic_today, default_zone_name
+
+STATS_KEY = 'appointments:stats'
+
+BREAKDOWNS = ('doctor', 'specialization', 'day')
+STAT_FIELDS = (
+    'total_appointments',
+    'pending',
+    'confirmed',
+    'cancelled',
+    'today_appointments',
+    'upcoming_appointments',
+)
+DAY_FIELDS = ('total_appointments', 'pending', 'confirmed', 'cancelled')
+
+_cache = VersionedCache(
+    STATS_KEY,
+    maxsize=64,
+    ttl=getattr(settings, 'APPOINTMENT_STATS_TTL', 30),
+    shared_version=True,
+)
+
+
+def stat_counts(today):
+    return {
+        'total_appointments': Count('pk'),
+        'pending': Count('pk', filter=Q(status='pending')),
+        'confirmed': Count('pk', filter=Q(status='confirmed')),
+        'cancelled': Count('pk', filter=Q(status='cancelled')),
+        'today_appointments': Count('pk', filter=Q(appointment_date=today)),
+        'upcoming_appointments': Count(
+            'pk', filter=Q(appointment_date__gte=today, status__in=ACTIVE_STATUSES)
+        ),
+    }
+
+
+def _add(target, row, fields=STAT_FIELDS):
+    for name in fields:
+        target[name] = target.get(name, 0) + row[name]
+    return target
+
+
+def build_stats(today, breakdowns=(), days=None):
+    """
+    Counts as of ``today``, plus a list per requested breakdown. ``days``
+    is the inclusive ``(start, end)`` range of the ``day`` breakdown.
+    """
+    counts = stat_counts(today)
+    if not breakdowns:
+        return Appointment.objects.aggregate(**counts)
+
+    queryset = Appointment.objects.order_by()
+    group = []
+    if 'doctor' in breakdowns:
+        group += ['doctor_id', 'doctor__name', 'doctor__specialization']
+    elif 'specialization' in breakdowns:
+        group += ['doctor__specialization']
+    if 'day' in breakdowns:
+        # Rows outside the range fall into one NULL group per doctor or
+        # specialization, so they still reach the totals.
+        start, end = days
+        queryset = queryset.annotate(day=Case(
+            When(appointment_date__range=(start, end), then=F('appointment_date')),
+            output_field=DateField(),
+        ))
+        group.append('day')
+
+    totals = dict.fromkeys(STAT_FIELDS, 0)
+    by_doctor, by_specialization, by_day = {}, {}, {}
+    for row in queryset.values(*group).annotate(**counts):
+        _add(totals, row)
+        if 'doctor' in breakdowns:
+            _add(by_doctor.setdefault(row['doctor_id'], {
+                'doctor_id': str(row['doctor_id']),
+                'doctor_name': row['doctor__name'],
+                'specialization': row['doctor__specialization'],
+            }), row)
+        if 'specialization' in breakdowns:
+            specialization = row['doctor__specialization']
+            _add(by_specialization.setdefault(specialization, {'specialization': specialization}), row)
+        if 'day' in breakdowns and row['day'] is not None:
+            _add(by_day.setdefault(row['day'], {}), row, DAY_FIELDS)
+
+    stats = totals
+    if 'doctor' in breakdowns:
+        stats['by_doctor'] = sorted(by_doctor.values(), key=lambda item: item['doctor_name'])
+    if 'specialization' in breakdowns:
+        stats['by_specialization'] = sorted(
+            by_specialization.values(), key=lambda item: item['specialization']
+        )
+    if 'day' in breakdowns:
+        start, end = days
+        stats['by_day'] = [
+            {
+                'date': day.isoformat(),
+                **{name: by_day.get(day, {}).get(name, 0) for name in DAY_FIELDS},
+            }
+            for day in (start + timedelta(days=n) for n in range((end - start).days + 1))
+        ]
+    return stats
+
+
+def get_stats(breakdowns=(), days=None):
+    """
+    Dashboard counts from process memory, the shared cache (if
+    configured) or build_stats, in that order.
+    """
+    today = clinic_today(default_zone_name())
+    breakdowns = tuple(sorted(set(breakdowns)))
+    if 'day' not in breakdowns:
+        days = None
+
+    key = f'{today}:{",".join(breakdowns)}:{days}'
+    return _cache.get(key, lambda key: build_stats(today, breakdowns, days))
+
+
+def invalidate_stats():
+    _cache.invalidate()
@@ -1,3 +1,743 @@
-from django.test import TestCase
+import asyncio
+import threading
+import uuid
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from doctors.models import Doctor, WeeklySchedule
+from doctors.profile_cache import get_profile
+from doctors.slots import iter_ticks, mask_from_bytes, time_to_tick
+
+from .availability import availability_grid, available_slots, next_available, with_free_slots
+from .booking import BOOKED, CONFLICT, SLOT_HELD, SLOT_TAKEN, book_appointment
+from .contacts import contact_filter, normalize_contact
+from .events import RESYNC, InProcessBroker, channel_name, get_broker
+from .holds import place_hold, release_hold
+from .models import Appointment, BookingRollup, DoctorDayOccupancy, Patient, SlotHold, WaitlistEntry
+from .patients import with_upcoming
+from .rollups import analytics
+from .stats import get_stats, invalidate_stats
+from .waitlist import join_waitlist
+from .zones import ALL_TICKS, clinic_today, past_mask
+
+
+def make_doctor(**kwargs):
+    return Doctor.objects.create(
+        name=kwargs.pop('name', 'Asha Rao'),
+        specialization=kwargs.pop('specialization', 'Cardiology'),
+        bio='',
+        years_of_experience=10,
+        _consultation_modes=['online', 'in-person'],
+        **kwargs,
+    )
+
+
+def booking(doctor, day, slot, patient='Patient', contact='9876543210'):
+    return book_appointment(
+        doctor.pk,
+        patient_name=patient,
+        patient_contact=contact,
+        consultation_type='online',
+        appointment_date=day,
+        appointment_time=slot,
+    )
+
+
+class BookingEngineTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+
+    def test_second_booking_gets_conflict_with_alternatives(self):
+        first = booking(self.doctor, self.day, time(10, 0))
+        second = booking(self.doctor, self.day, time(10, 0), patient='Other')
+
+        self.assertEqual(first.status, BOOKED)
+        self.assertEqual(second.status, CONFLICT)
+        self.assertEqual(second.reason, SLOT_TAKEN)
+        self.assertEqual(
+            second.alternatives,
+            [(self.day, '09:00'), (self.day, '09:30'), (self.day, '10:30')],
+        )
+
+    def test_cancelled_slot_can_be_rebooked(self):
+        first = booking(self.doctor, self.day, time(10, 0))
+        first.appointment.status = 'cancelled'
+        first.appointment.save()
+
+        self.assertEqual(booking(self.doctor, self.day, time(10, 0)).status, BOOKED)
+        self.assertEqual(
+            DoctorDayOccupancy.objects.get(doctor=self.doctor, date=self.day).booked_count, 1
+        )
+
+
+    def test_only_a_booking_that_went_in_creates_a_patient(self):
+        first = booking(self.doctor, self.day, time(10, 0), patient='First')
+        booking(self.doctor, self.day, time(10, 0), patient='Second', contact='9123456789')
+
+        patient = Patient.objects.get()
+        self.assertEqual((patient.name, patient.total_appointments), ('First', 1))
+        self.assertEqual(Appointment.objects.get().patient_id, patient.pk)
+        self.assertEqual(first.appointment.patient_id, patient.pk)
+
+
+class FreeSlotFilterTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+
+    def hold(self, slot):
+        SlotHold.objects.create(
+            doctor=self.doctor,
+            appointment_date=self.day,
+            appointment_time=slot,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+    def free_slots(self):
+        doctors = with_free_slots(Doctor.objects.filter(pk=self.doctor.pk), self.day)
+        return doctors.values_list('free_slots', flat=True).first() or 0
+
+    def test_counts_like_open_slots(self):
+        booking(self.doctor, self.day, time(10, 0))
+        self.hold(time(11, 0))
+
+        self.assertEqual(self.free_slots(), 14)
+        self.assertEqual(self.free_slots(), len(available_slots(self.doctor.pk, self.day)))
+
+    def test_holds_off_grid_or_on_booked_slots_take_nothing(self):
+        booking(self.doctor, self.day, time(10, 0))
+        self.hold(time(10, 0))
+        self.hold(time(10, 5))
+        self.hold(time(7, 0))
+
+        self.assertEqual(self.free_slots(), 15)
+        self.assertEqual(self.free_slots(), len(available_slots(self.doctor.pk, self.day)))
+
+    def test_fully_taken_doctor_is_dropped(self):
+        for hour in range(9, 17):
+            self.hold(time(hour, 0))
+            self.hold(time(hour, 30))
+
+        self.assertFalse(with_free_slots(Doctor.objects.filter(pk=self.doctor.pk), self.day).exists())
+
+
+class AvailabilityGridTests(TestCase):
+
+    def setUp(self):
+        self.doctors = [make_doctor(), make_doctor(name='Vikram Rao')]
+        self.start = date.today() + timedelta(days=7)
+        self.end = self.start + timedelta(days=2)
+        booking(self.doctors[0], self.start, time(9, 0))
+        booking(self.doctors[1], self.end, time(16, 30))
+
+    def test_cells_match_available_slots(self):
+        grid = availability_grid([doctor.pk for doctor in self.doctors], self.start, self.end)
+
+        for doctor in self.doctors:
+            for offset in range(3):
+                day = self.start + timedelta(days=offset)
+                with self.subTest(doctor=doctor.name, day=day):
+                    self.assertEqual(grid[str(doctor.pk)][day.isoformat()], available_slots(doctor.pk, day))
+
+    def test_unknown_and_inactive_doctors_are_left_out(self):
+        inactive = make_doctor(name='Meera Iyer', is_active=False)
+        grid = availability_grid([self.doctors[0].pk, inactive.pk, uuid.uuid4()], self.start, self.end)
+
+        self.assertEqual(list(grid), [str(self.doctors[0].pk)])
+
+    def test_query_count_does_not_grow_with_the_range(self):
+        ids = [doctor.pk for doctor in self.doctors]
+        availability_grid(ids, self.start, self.start)
+        with CaptureQueriesContext(connection) as one_day:
+            availability_grid(ids, self.start, self.start)
+        with CaptureQueriesContext(connection) as month:
+            availability_grid(ids, self.start, self.start + timedelta(days=30))
+
+        self.assertEqual(len(month), len(one_day))
+
+
+class OccupancyTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+
+    def occupancy(self, day=None):
+        row = DoctorDayOccupancy.objects.filter(doctor=self.doctor, date=day or self.day).first()
+        if row is None:
+            return None
+        return row.booked_count, list(iter_ticks(mask_from_bytes(row.booked_mask)))
+
+    def test_follows_bookings_moves_and_cancellations(self):
+        nine = booking(self.doctor, self.day, time(9, 0)).appointment
+        ten = booking(self.doctor, self.day, time(10, 0), contact='9876500000').appointment
+        self.assertEqual(self.occupancy(), (2, [time_to_tick(time(9, 0)), time_to_tick(time(10, 0))]))
+
+        ten.appointment_date = self.day + timedelta(days=1)
+        ten.save()
+        nine.status = 'cancelled'
+        nine.save()
+        self.assertEqual(self.occupancy(), (0, []))
+        self.assertEqual(self.occupancy(self.day + timedelta(days=1)), (1, [time_to_tick(time(10, 0))]))
+
+        ten.delete()
+        self.assertEqual(self.occupancy(self.day + timedelta(days=1)), (0, []))
+
+    def test_rebuild_repairs_drift(self):
+        booking(self.doctor, self.day, time(9, 0))
+        DoctorDayOccupancy.objects.filter(doctor=self.doctor).delete()
+        DoctorDayOccupancy.objects.create(doctor=self.doctor, date=self.day + timedelta(days=3), booked_count=2)
+
+        with self.assertRaisesMessage(CommandError, '1 missing, 0 wrong, 1 stale'):
+            call_command('rebuild_occupancy', verify=True, stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_occupancy', stdout=StringIO())
+        call_command('rebuild_occupancy', verify=True, stdout=StringIO())
+
+        self.assertEqual(self.occupancy(), (1, [time_to_tick(time(9, 0))]))
+        self.assertIsNone(self.occupancy(self.day + timedelta(days=3)))
+
+
+class RecordingBroker(InProcessBroker):
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event['type'], event['time']))
+        super().publish(channel, event)
+
+
+@override_settings(SLOT_EVENT_BROKER='appointments.tests.RecordingBroker')
+class SlotEventTests(TestCase):
+
+    def setUp(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+        self.channel = channel_name(self.doctor.pk, self.day)
+
+    def test_writes_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = booking(self.doctor, self.day, time(9, 0)).appointment
+            self.assertEqual(get_broker().published, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.appointment_time = time(9, 30)
+            appointment.save()
+
+        self.assertEqual(get_broker().published, [
+            (self.channel, 'slot-taken', '09:00'),
+            (self.channel, 'slot-freed', '09:00'),
+            (self.channel, 'slot-taken', '09:30'),
+        ])
+
+    def test_slow_subscriber_gets_one_resync(self):
+        async def overflow():
+            broker = get_broker()
+            subscription = broker.subscribe(self.channel)
+            # One more than the queue holds.
+            for n in range(101):
+                broker.publish(self.channel, {'type': 'slot-taken', 'time': str(n)})
+            await asyncio.sleep(0)
+            event = await subscription.get()
+            subscription.close()
+            return event, subscription.queue.qsize(), broker.subscriber_count(self.channel)
+
+        self.assertEqual(asyncio.run(overflow()), ({'type': RESYNC}, 0, 0))
+
+    def test_stream_needs_asgi(self):
+        response = self.client.get(
+            '/api/appointments/available-slots/stream/',
+            {'doctor_id': str(self.doctor.pk), 'date': self.day.isoformat()},
+        )
+
+        self.assertEqual(response.status_code, 501)
+
+
+class SlotHoldTests(TestCase):
+
+    def setUp(self):
+        # The hold throttle counts requests in the default cache.
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+
+    def hold(self, slot):
+        return self.client.post('/api/appointments/holds/', {
+            'doctor': str(self.doctor.pk),
+            'appointment_date': self.day.isoformat(),
+            'appointment_time': slot,
+        }, format='json')
+
+    def test_hold_keeps_the_slot_for_its_holder(self):
+        token = uuid.UUID(self.hold('10:00').json()['token'])
+
+        taken = booking(self.doctor, self.day, time(10, 0))
+        self.assertEqual((taken.status, taken.reason), (CONFLICT, SLOT_HELD))
+        self.assertEqual(self.hold('10:00').status_code, 400)
+
+        used = book_appointment(
+            self.doctor.pk,
+            patient_name='Patient',
+            patient_contact='9876543210',
+            consultation_type='online',
+            appointment_date=self.day,
+            appointment_time=time(10, 0),
+            hold_token=token,
+        )
+        self.assertEqual(used.status, BOOKED)
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_expired_hold_is_replaced(self):
+        place_hold(self.doctor.pk, self.day, time(10, 0))
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.hold('10:00').status_code, 201)
+        self.assertEqual(SlotHold.objects.count(), 1)
+
+    def test_booked_slot_cannot_be_held(self):
+        booking(self.doctor, self.day, time(10, 0))
+
+        self.assertEqual(self.hold('10:00').status_code, 400)
+        # Past the serializer's pre-check, the insert path refuses it too.
+        self.assertIsNone(place_hold(self.doctor.pk, self.day, time(10, 0)))
+        self.assertFalse(SlotHold.objects.exists())
+
+    @override_settings(SLOT_HOLD_MAX_PER_CLIENT=2)
+    def test_live_holds_are_capped_per_client(self):
+        first = self.hold('09:00').json()['token']
+        self.assertEqual(self.hold('09:30').status_code, 201)
+
+        refused = self.hold('10:00')
+        self.assertEqual(refused.status_code, 429)
+        self.assertIn('error', refused.json())
+
+        self.assertEqual(self.client.delete(f'/api/appointments/holds/{first}/').status_code, 204)
+        self.assertEqual(self.hold('10:00').status_code, 201)
+
+
+class NextAvailableTests(TestCase):
+
+    def setUp(self):
+        # Both doctors work one weekday only, two days out, so nothing
+        # depends on the time of day the test runs at.
+        self.day = clinic_today('UTC') + timedelta(days=2)
+        self.first = make_doctor()
+        self.second = make_doctor(name='Vikram Rao')
+        for doctor, start in ((self.first, time(9, 0)), (self.second, time(9, 15))):
+            WeeklySchedule.objects.create(
+                doctor=doctor, weekday=self.day.weekday(), start_time=start,
+                end_time=time(start.hour + 1, start.minute), slot_minutes=30,
+            )
+        self.zones = {self.first.pk: 'UTC', self.second.pk: 'UTC'}
+
+    def test_earliest_slots_across_doctors_in_time_order(self):
+        booking(self.first, self.day, time(9, 0))
+
+        self.assertEqual(next_available(self.zones, 3, 7), [
+            (self.day, '09:15', str(self.second.pk)),
+            (self.day, '09:30', str(self.first.pk)),
+            (self.day, '09:45', str(self.second.pk)),
+        ])
+
+    def test_later_weeks_are_searched_within_the_horizon(self):
+        slots = next_available(self.zones, 6, 14)
+
+        self.assertEqual(len(slots), 6)
+        self.assertEqual({day for day, _, _ in slots[4:]}, {self.day + timedelta(days=7)})
+        self.assertEqual(len(next_available(self.zones, 6, 7)), 4)
+
+
+class TimeZoneTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor(timezone='Asia/Kolkata')
+
+    def slots(self, **params):
+        return self.client.get('/api/appointments/available-slots/', {
+            'doctor_id': str(self.doctor.pk), 'date': '2030-07-01', **params,
+        })
+
+    def test_client_slots_are_rendered_in_the_client_zone(self):
+        data = self.slots(tz='America/New_York').json()
+
+        self.assertEqual(data['timezone'], 'Asia/Kolkata')
+        self.assertEqual(data['available_slots'][:2], ['09:00', '09:30'])
+        self.assertEqual(data['client_slots'][:2], ['2030-06-30T23:30-04:00', '2030-07-01T00:00-04:00'])
+        self.assertEqual(len(data['client_slots']), len(data['available_slots']))
+
+    def test_unknown_client_zone_is_rejected(self):
+        self.assertEqual(self.slots(tz='Mars/Olympus').status_code, 400)
+
+    def test_past_is_judged_in_the_clinic_zone(self):
+        today = clinic_today('Asia/Kolkata')
+
+        self.assertEqual(past_mask('Asia/Kolkata', today - timedelta(days=1)), ALL_TICKS)
+        self.assertEqual(past_mask('Asia/Kolkata', today + timedelta(days=1)), 0)
+
+
+class WaitlistPromotionTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+        self.appointment = booking(self.doctor, self.day, time(10, 0)).appointment
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+
+    def join(self, name, mode='online'):
+        return join_waitlist(self.doctor.pk, self.day, mode, name, f'90000{len(name):05d}')
+
+    def statuses(self):
+        return dict(WaitlistEntry.objects.values_list('patient_name', 'status'))
+
+    def test_cancellation_promotes_the_oldest_entry_on_commit(self):
+        self.join('First')
+        self.join('Second')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/appointments/admin/appointments/{self.appointment.pk}/',
+                {'status': 'cancelled'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.statuses(), {'First': 'promoted', 'Second': 'waiting'})
+        promoted = WaitlistEntry.objects.get(status='promoted').appointment
+        self.assertEqual((promoted.appointment_time, promoted.status), (time(10, 0), 'pending'))
+
+    def test_entries_for_a_dropped_mode_keep_waiting(self):
+        self.join('In person', mode='in-person')
+        self.join('Online')
+        self.doctor.consultation_modes = ['online']
+        self.doctor.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.delete()
+
+        self.assertEqual(self.statuses(), {'In person': 'waiting', 'Online': 'promoted'})
+
+    def test_released_hold_promotes(self):
+        hold = place_hold(self.doctor.pk, self.day, time(11, 0))
+        self.join('First')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release_hold(hold.token)
+
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.status, entry.appointment.appointment_time), ('promoted', time(11, 0)))
+
+
+class ContactLookupTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+        contacts = ['+91 98765 43210', '098765-43210', '+44 (0) 98765 43210', '9123456789']
+        for hour, contact in enumerate(contacts, start=9):
+            booking(self.doctor, self.day, time(hour, 0), contact=contact)
+
+    def matched(self, query):
+        return sorted(
+            Appointment.objects.filter(contact_filter(query)).values_list('patient_contact', flat=True)
+        )
+
+    def test_normalization_drops_prefixes_and_trunk_zeros(self):
+        self.assertEqual(normalize_contact('+91 98765 43210'), '919876543210')
+        self.assertEqual(normalize_contact('0091 98765 43210'), '919876543210')
+        self.assertEqual(normalize_contact('098765-43210'), '9876543210')
+        self.assertEqual(normalize_contact('+44 (0) 98765 43210'), '449876543210')
+
+    def test_national_number_matches_every_country_code(self):
+        self.assertEqual(
+            self.matched('98765 43210'), ['+44 (0) 98765 43210', '+91 98765 43210', '098765-43210']
+        )
+
+    def test_full_number_matches_itself_and_the_national_form(self):
+        self.assertEqual(self.matched('0091 9876543210'), ['+91 98765 43210', '098765-43210'])
+        self.assertIsNone(contact_filter('12345'))
+
+    def test_my_appointments_uses_the_lookup(self):
+        response = self.client.get('/api/appointments/my-appointments/', {'contact': '+91-9876543210'})
+
+        self.assertEqual(len(response.json()), 2)
+
+
+class PatientTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.day = date.today() + timedelta(days=7)
+
+    def counts(self):
+        return list(with_upcoming(Patient.objects.all()).values_list(
+            'total_appointments', 'upcoming_appointments', 'cancelled_appointments'
+        ))
+
+    def test_one_patient_per_national_number(self):
+        booking(self.doctor, self.day, time(9, 0), contact='+91 98765 43210')
+        cancelled = booking(self.doctor, self.day, time(9, 30), contact='098765 43210').appointment
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        self.assertEqual(Patient.objects.get().contact, '9876543210')
+        self.assertEqual(self.counts(), [(2, 1, 1)])
+
+    def test_upcoming_ages_without_writes(self):
+        appointment = booking(self.doctor, self.day, time(9, 0)).appointment
+        Appointment.objects.filter(pk=appointment.pk).update(appointment_date=date.today() - timedelta(days=1))
+
+        self.assertEqual(self.counts(), [(1, 0, 0)])
+
+    def test_drifted_counters_floor_at_zero_and_recount(self):
+        appointment = booking(self.doctor, self.day, time(9, 0)).appointment
+        booking(self.doctor, self.day, time(9, 30))
+        Patient.objects.update(total_appointments=0)
+
+        appointment.delete()
+        self.assertEqual(self.counts(), [(0, 1, 0)])
+
+        call_command('backfill_patients', recount=True, stdout=StringIO())
+        self.assertEqual(self.counts(), [(1, 1, 0)])
+
+    def test_backfill_links_appointments_without_a_patient(self):
+        booking(self.doctor, self.day, time(9, 0), contact='+91 98765 43210')
+        Appointment.objects.update(patient=None)
+        Patient.objects.all().delete()
+
+        call_command('backfill_patients', stdout=StringIO())
+        self.assertEqual(Appointment.objects.get().patient.contact, '9876543210')
+        self.assertEqual(self.counts(), [(1, 1, 0)])
+
+
+class AdminStatsTests(TestCase):
+
+    def setUp(self):
+        # Cached counts outlive the rolled-back rows of earlier tests.
+        invalidate_stats()
+        self.doctors = [make_doctor(), make_doctor(name='Vikram Rao')]
+        self.day = date.today() + timedelta(days=7)
+        booking(self.doctors[0], self.day, time(9, 0))
+        booking(self.doctors[1], self.day, time(9, 0))
+        cancelled = booking(self.doctors[1], self.day, time(9, 30)).appointment
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+    def test_counts_and_breakdowns_agree(self):
+        stats = get_stats(['doctor'])
+
+        self.assertEqual(
+            {name: stats[name] for name in ('total_appointments', 'pending', 'cancelled', 'upcoming_appointments')},
+            {'total_appointments': 3, 'pending': 2, 'cancelled': 1, 'upcoming_appointments': 2},
+        )
+        self.assertEqual(
+            [(row['doctor_name'], row['total_appointments']) for row in stats['by_doctor']],
+            [('Asha Rao', 1), ('Vikram Rao', 2)],
+        )
+
+    def test_cached_until_an_appointment_write_commits(self):
+        get_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_stats()['total_appointments'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking(self.doctors[0], self.day, time(10, 0))
+        self.assertEqual(get_stats()['total_appointments'], 4)
+
+    def test_day_breakdown_covers_the_range(self):
+        stats = get_stats(['day'], (self.day, self.day + timedelta(days=1)))
+
+        self.assertEqual([row['total_appointments'] for row in stats['by_day']], [3, 0])
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.doctors = [make_doctor(), make_doctor(name='Vikram Rao', specialization='Surgery')]
+        self.day = date.today() + timedelta(days=7)
+        booking(self.doctors[0], self.day, time(9, 0))
+        booking(self.doctors[0], self.day, time(14, 30))
+        moved = booking(self.doctors[1], self.day, time(9, 30)).appointment
+        moved.appointment_time = time(10, 0)
+        moved.status = 'confirmed'
+        moved.save()
+
+    def by_hour(self, **filters):
+        return {
+            row['hour']: row['total']
+            for row in analytics(self.day, self.day, 'hour', **filters) if row['total']
+        }
+
+    def test_rollups_follow_appointment_writes(self):
+        self.assertEqual(self.by_hour(), {9: 1, 10: 1, 14: 1})
+        self.assertEqual(
+            [(row['doctor_name'], row['pending'], row['confirmed']) for row in analytics(self.day, self.day, 'doctor')],
+            [('Asha Rao', 2, 0), ('Vikram Rao', 0, 1)],
+        )
+        self.assertEqual(self.by_hour(specialization='surgery'), {10: 1})
+
+    def test_day_series_includes_empty_days(self):
+        series = analytics(self.day - timedelta(days=1), self.day, 'day')
+
+        self.assertEqual([(row['date'], row['total']) for row in series], [
+            ((self.day - timedelta(days=1)).isoformat(), 0), (self.day.isoformat(), 3),
+        ])
+
+    def test_rebuild_repairs_drift(self):
+        BookingRollup.objects.filter(doctor=self.doctors[0]).update(count=9)
+        BookingRollup.objects.filter(doctor=self.doctors[1]).delete()
+
+        with self.assertRaisesMessage(CommandError, '1 missing, 1 wrong, 0 stale'):
+            call_command('rebuild_rollups', verify=True, stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+
+        self.assertEqual(self.by_hour(), {9: 1, 10: 1, 14: 1})
+        self.assertEqual(analytics(self.day, self.day)[0]['total'], 3)
+
+
+# SQLite serializes writers with table locks and errors out under this
+# load; the test is meant for PostgreSQL.
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentBookingTests(TransactionTestCase):
+
+    threads = 16
+
+    def test_one_slot_many_threads(self):
+        doctor = make_doctor()
+        day = date.today() + timedelta(days=7)
+        profile = get_profile(doctor.pk)
+        start = threading.Barrier(self.threads)
+
+        def attempt(n):
+            try:
+                start.wait()
+                return book_appointment(
+                    profile,
+                    patient_name=f'Patient {n}',
+                    patient_contact=f'98765{n:05d}',
+                    consultation_type='online',
+                    appointment_date=day,
+                    appointment_time=time(11, 0),
+                    alternatives=0,
+                ).status
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as pool:
+            statuses = list(pool.map(attempt, range(self.threads)))
+
+        self.assertEqual(statuses.count(BOOKED), 1)
+        self.assertEqual(statuses.count(CONFLICT), self.threads - 1)
+        self.assertEqual(Appointment.objects.filter(doctor=doctor).count(), 1)
+        self.assertEqual(DoctorDayOccupancy.objects.get(doctor=doctor, date=day).booked_count, 1)
+
+
+@override_settings(ADMIN_APPOINTMENT_LIST_LEGACY_UNPAGINATED=False)
+class AdminAppointmentListPlanTests(TestCase):
+    """Every filter mix of the admin list pages through an index."""
+
+    rows = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        doctors = [make_doctor(name=f'Doctor {n}') for n in range(20)]
+        start = date(2025, 1, 1)
+        statuses = ('pending', 'confirmed', 'cancelled')
+        Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    doctor=doctors[n % len(doctors)],
+                    patient_name=f'Patient {n}',
+                    patient_contact=f'9{n:09d}',
+                    consultation_type='online',
+                    appointment_date=start + timedelta(days=k // 8),
+                    appointment_time=time(9 + k % 8, 0),
+                    status=statuses[n % 3],
+                )
+                for n, k in ((n, n // len(doctors)) for n in range(cls.rows))
+            ],
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.doctor = doctors[3]
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def list_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/appointments/admin/appointments/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "appointments_appointment"' in query['sql']
+        ]
+
+    def assert_no_table_scan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN ' + sql)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                self.assertNotIn('Seq Scan on appointments_appointment', plan, sql)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                # Only the unfiltered list may walk an index end to end,
+                # and that one is already in page order.
+                self.assertNotRegex(
+                    plan, r'SCAN appointments_appointment(?! USING INDEX appt_created_keyset_idx)', sql
+                )
+
+    def test_every_filter_mix_uses_an_index(self):
+        filters = {
+            'doctor': str(self.doctor.pk),
+            'date': '2025-03-04',
+            'status': 'confirmed',
+        }
+        for mask in range(1 << len(filters)):
+            params = {
+                name: value for bit, (name, value) in enumerate(filters.items()) if mask >> bit & 1
+            }
+            with self.subTest(**params):
+                page, queries = self.list_queries({**params, 'page_size': 5})
+                self.assertEqual(len(queries), 1)
+                self.assert_no_table_scan(queries[0])
+                if page['next']:
+                    cursor = page['next'].split('cursor=')[1].split('&')[0]
+                    _, queries = self.list_queries({**params, 'page_size': 5, 'cursor': cursor})
+                    self.assert_no_table_scan(queries[0])
+
+    def test_pages_follow_created_at_then_id(self):
+        seen = []
+        params = {'doctor': str(self.doctor.pk), 'page_size': 200}
+        while True:
+            page, _ = self.list_queries(params)
+            seen.extend(row['id'] for row in page['results'])
+            if not page['next']:
+                break
+            params['cursor'] = page['next'].split('cursor=')[1].split('&')[0]
+        expected = [
+            str(pk) for pk in Appointment.objects.filter(doctor=self.doctor)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+        self.assertEqual(seen, expected)
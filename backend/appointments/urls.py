@@ -2,18 +2,34 @@ from django.urls import path
 from .views import (
     AppointmentCreateView,
     AvailableTimeSlotsView,
+    AvailabilityGridView,
+    NextAvailableView,
+    available_slots_stream,
+    SlotHoldCreateView,
+    SlotHoldDetailView,
+    WaitlistCreateView,
+    WaitlistEntryDetailView,
     MyAppointmentsView,
     AdminAppointmentListView,
     AdminAppointmentDetailView,
     AdminAppointmentStatsView,
+    AdminAnalyticsView,
 )
 
 urlpatterns = [
     path("", AppointmentCreateView.as_view(), name="appointment-create"),
     path("available-slots/", AvailableTimeSlotsView.as_view(), name="available-slots"),
+    path("available-slots/stream/", available_slots_stream, name="available-slots-stream"),
+    path("holds/", SlotHoldCreateView.as_view(), name="slot-hold-create"),
+    path("holds/<uuid:token>/", SlotHoldDetailView.as_view(), name="slot-hold-detail"),
+    path("waitlist/", WaitlistCreateView.as_view(), name="waitlist-create"),
+    path("waitlist/<uuid:pk>/", WaitlistEntryDetailView.as_view(), name="waitlist-entry-detail"),
+    path("availability-grid/", AvailabilityGridView.as_view(), name="availability-grid"),
+    path("next-available/", NextAvailableView.as_view(), name="next-available"),
     path("my-appointments/", MyAppointmentsView.as_view(), name="my-appointments"),
 
     path("admin/appointments/", AdminAppointmentListView.as_view(), name="admin-appointment-list"),
     path("admin/appointments/<uuid:pk>/", AdminAppointmentDetailView.as_view(), name="admin-appointment-detail"),
     path("admin/stats/", AdminAppointmentStatsView.as_view(), name="admin-stats"),
+    path("admin/analytics/", AdminAnalyticsView.as_view(), name="admin-analytics"),
 ]
\ No newline at end of file
@@ -1,15 +1,35 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
-from django.db import IntegrityError
-from datetime import datetime
-
-from .models import Appointment
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from datetime import datetime, timedelta
+import uuid
+
+from .availability import availability_grid, available_slots, next_available, open_slots
+from .booking import BOOKING_ERRORS, SLOT_TAKEN
+from .contacts import contact_filter
+from .events import slot_event_stream
+from .fast_serializers import FastAppointmentAdminSerializer, FastAppointmentDetailSerializer
+from .holds import live_hold_count, max_holds_per_client, reap_expired_holds_if_due, release_hold
+from .models import Appointment, WaitlistEntry
+from .pagination import AdminAppointmentPagination
+from .rollups import GROUP_BY, analytics
 from .serializers import (
     AppointmentCreateSerializer,
     AppointmentDetailSerializer,
     AppointmentAdminSerializer,
+    SlotHoldSerializer,
+    WaitlistEntrySerializer,
 )
+from .stats import BREAKDOWNS, get_stats
+from .waitlist import leave_waitlist
+from .zones import client_labels, client_start, clinic_today, default_zone_name, is_valid_zone
+from doctors.fast_serializers import FastListMixin
+from doctors.models import CONSULTATION_MODES, Doctor, supports_mode_filter
+from doctors.slots import labels_of
 from doctors.views import IsAdminUser
 
 
@@ -24,33 +44,44 @@ class AppointmentCreateView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        try:
-            self.perform_create(serializer)
-            appointment = serializer.instance   
-            detail_serializer = AppointmentDetailSerializer(appointment)
-
+        result = serializer.book()
+        if not result.booked:
             return Response(
                 {
-                    "message": "Appointment booked successfully",
-                    "appointment": detail_serializer.data,
+                    "error": BOOKING_ERRORS[result.reason],
+                    "reason": result.reason,
+                    "alternatives": [
+                        {"date": day.isoformat(), "time": label}
+                        for day, label in result.alternatives
+                    ],
                 },
-                status=status.HTTP_201_CREATED,
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        except IntegrityError:
-            return Response(
-                {
-                    "error": "This time slot is already booked. Please choose another time."
-                },
-                status=status.HTTP_400_BAD_REQUEST,
+        appointment = result.appointment
+        data = {
+            "message": "Appointment booked successfully",
+            "appointment": AppointmentDetailSerializer(appointment).data,
+        }
+        client_zone = serializer.validated_data.get("client_timezone")
+        if client_zone:
+            data["client_timezone"] = client_zone
+            data["client_start"] = client_start(
+                appointment.appointment_date,
+                appointment.appointment_time,
+                serializer.clinic_zone(),
+                client_zone,
             )
 
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 
-class MyAppointmentsView(generics.ListAPIView):
+
+class MyAppointmentsView(FastListMixin, generics.ListAPIView):
 
     serializer_class = AppointmentDetailSerializer
+    fast_serializer_class = FastAppointmentDetailSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
@@ -59,10 +90,12 @@ class MyAppointmentsView(generics.ListAPIView):
         if not contact:
             return Appointment.objects.none()
         
-        cleaned_contact = contact.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+        lookup = contact_filter(contact)
+        if lookup is None:
+            return Appointment.objects.none()
         
         queryset = Appointment.objects.select_related('doctor').filter(
-            patient_contact__icontains=cleaned_contact
+            lookup
         ).order_by('-appointment_date', '-appointment_time')
         
         return queryset
@@ -76,6 +109,7 @@ class AvailableTimeSlotsView(APIView):
     def get(self, request):
         doctor_id = request.query_params.get("doctor_id")
         date_str = request.query_params.get("date")
+        client_zone = request.query_params.get("tz")
 
         if not doctor_id or not date_str:
             return Response(
@@ -91,39 +125,331 @@ class AvailableTimeSlotsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        all_slots = []
-        for hour in range(9, 17):
-            all_slots.append(f"{hour:02d}:00")
-            all_slots.append(f"{hour:02d}:30")
+        if client_zone and not is_valid_zone(client_zone):
+            return Response(
+                {"error": f"Unknown time zone: {client_zone}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        mask, clinic_zone = open_slots(doctor_id, appointment_date)
+        data = {
+            "date": date_str,
+            "timezone": clinic_zone,
+            "available_slots": labels_of(mask),
+        }
+        if client_zone:
+            # Same slots, as ISO datetimes in the client's zone.
+            data["client_timezone"] = client_zone
+            data["client_slots"] = client_labels(mask, clinic_zone, client_zone, appointment_date)
+
+        return Response(data)
+
+
+async def available_slots_stream(request):
+    """
+    Server-sent events for one doctor's day: the current open slots, then
+    slot-taken / slot-freed deltas as appointments are booked or
+    cancelled. Needs an ASGI server (booking_system.asgi).
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI every open stream would pin a sync worker for as long
+        # as the client stays connected.
+        return JsonResponse(
+            {"error": "Slot streaming requires the ASGI server. Poll available-slots/ instead."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
 
-        booked_appointments = Appointment.objects.filter(
-            doctor_id=doctor_id,
-            appointment_date=appointment_date,
-            status__in=["pending", "confirmed"],
-        ).values_list("appointment_time", flat=True)
+    doctor_id = request.GET.get("doctor_id")
+    date_str = request.GET.get("date")
 
-        booked_slots = [t.strftime("%H:%M") for t in booked_appointments]
+    if not doctor_id or not date_str:
+        return JsonResponse(
+            {"error": "doctor_id and date are required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        available_slots = [
-            slot for slot in all_slots if slot not in booked_slots
-        ]
+    try:
+        doctor_id = uuid.UUID(doctor_id)
+        appointment_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid doctor_id or date. Use a UUID and YYYY-MM-DD"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    response = StreamingHttpResponse(
+        slot_event_stream(
+            doctor_id,
+            appointment_date,
+            lambda: available_slots(doctor_id, appointment_date),
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+
+class SlotHoldCreateView(generics.CreateAPIView):
+    """
+    Anonymous clients may hold slots, so holds are rate limited per client
+    address (the slot_holds throttle scope) and each address may keep at
+    most SLOT_HOLD_MAX_PER_CLIENT live holds at once.
+    """
+
+    serializer_class = SlotHoldSerializer
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'slot_holds'
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['client'] = ScopedRateThrottle().get_ident(self.request)
+        return context
+
+    def create(self, request, *args, **kwargs):
+        reap_expired_holds_if_due()
+
+        if live_hold_count(ScopedRateThrottle().get_ident(request)) >= max_holds_per_client():
+            return Response(
+                {"error": "You are already holding too many slots. Book or release one first."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            self.perform_create(serializer)
+        except IntegrityError:
+            return Response(
+                {
+                    "error": "This time slot is being held by another patient. Please choose another time."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SlotHoldDetailView(APIView):
+
+    permission_classes = [permissions.AllowAny]
+
+    def delete(self, request, token):
+        if not release_hold(token):
+            return Response(
+                {"error": "Hold not found or already expired"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class WaitlistCreateView(generics.CreateAPIView):
+
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.AllowAny]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            self.perform_create(serializer)
+        except IntegrityError:
+            return Response(
+                {"error": "You are already on the waitlist for this date"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class WaitlistEntryDetailView(APIView):
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        entry = WaitlistEntry.objects.filter(pk=pk).first()
+        if entry is None:
+            return Response(
+                {"error": "Waitlist entry not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(WaitlistEntrySerializer(entry).data)
+
+    def delete(self, request, pk):
+        if not leave_waitlist(pk):
+            return Response(
+                {"error": "Waitlist entry not found or no longer waiting"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+
+class AvailabilityGridView(APIView):
+
+    permission_classes = [permissions.AllowAny]
+
+    MAX_DOCTORS = 50
+    MAX_DAYS = 31
+
+    def get(self, request):
+        doctor_ids_param = request.query_params.get("doctor_ids", "")
+        start_str = request.query_params.get("start")
+        end_str = request.query_params.get("end")
+
+        if not doctor_ids_param or not start_str or not end_str:
+            return Response(
+                {"error": "doctor_ids, start and end are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            doctor_ids = list(dict.fromkeys(
+                uuid.UUID(value.strip()) for value in doctor_ids_param.split(",") if value.strip()
+            ))
+        except ValueError:
+            return Response(
+                {"error": "doctor_ids must be a comma-separated list of UUIDs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            start = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end = datetime.strptime(end_str, "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date format. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if end < start:
+            return Response(
+                {"error": "end must not be before start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(doctor_ids) > self.MAX_DOCTORS or (end - start).days + 1 > self.MAX_DAYS:
+            return Response(
+                {"error": f"At most {self.MAX_DOCTORS} doctors and {self.MAX_DAYS} days per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "start": start_str,
+                "end": end_str,
+                "availability": availability_grid(doctor_ids, start, end),
+            }
+        )
+
+
+
+class NextAvailableView(APIView):
+    """
+    Earliest open slots across a specialization or a list of doctors:
+    ?specialization= or ?doctor_ids=a,b plus optional consultation_type,
+    limit (default 5) and horizon in days (default 30). Dates and times
+    are in each doctor's clinic zone.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    DEFAULT_LIMIT = 5
+    MAX_LIMIT = 50
+    DEFAULT_HORIZON = 30
+    MAX_HORIZON = 90
+
+    def get(self, request):
+        specialization = request.query_params.get("specialization", "").strip()
+        doctor_ids_param = request.query_params.get("doctor_ids", "").strip()
+        consultation_type = request.query_params.get("consultation_type")
+
+        if not specialization and not doctor_ids_param:
+            return Response(
+                {"error": "specialization or doctor_ids is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if consultation_type and consultation_type not in CONSULTATION_MODES:
+            return Response(
+                {"error": f"Invalid consultation type: {consultation_type}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = int(request.query_params.get("limit", self.DEFAULT_LIMIT))
+            horizon = int(request.query_params.get("horizon", self.DEFAULT_HORIZON))
+        except ValueError:
+            return Response(
+                {"error": "limit and horizon must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 1 <= limit <= self.MAX_LIMIT or not 1 <= horizon <= self.MAX_HORIZON:
+            return Response(
+                {"error": f"limit must be 1-{self.MAX_LIMIT} and horizon 1-{self.MAX_HORIZON} days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        doctors = Doctor.objects.filter(is_active=True)
+        if specialization:
+            doctors = doctors.filter(specialization__icontains=specialization)
+        if doctor_ids_param:
+            try:
+                doctor_ids = [uuid.UUID(value.strip()) for value in doctor_ids_param.split(",") if value.strip()]
+            except ValueError:
+                return Response(
+                    {"error": "doctor_ids must be a comma-separated list of UUIDs"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            doctors = doctors.filter(id__in=doctor_ids)
+        if consultation_type:
+            doctors = doctors.filter(supports_mode_filter(consultation_type))
+
+        doctors = {
+            str(doctor["id"]): doctor
+            for doctor in doctors.order_by().values("id", "name", "specialization", "timezone")
+        }
+
+        slots = next_available(
+            {doctor_id: doctor["timezone"] for doctor_id, doctor in doctors.items()},
+            limit,
+            horizon,
+        )
 
         return Response(
             {
-                "date": date_str,
-                "available_slots": available_slots,
+                "results": [
+                    {
+                        "doctor": {
+                            "id": doctor_id,
+                            "name": doctors[doctor_id]["name"],
+                            "specialization": doctors[doctor_id]["specialization"],
+                        },
+                        "date": day.isoformat(),
+                        "time": label,
+                        "timezone": doctors[doctor_id]["timezone"],
+                    }
+                    for day, label, doctor_id in slots
+                ],
+                "horizon_days": horizon,
             }
         )
 
 
 
-class AdminAppointmentListView(generics.ListAPIView):
+class AdminAppointmentListView(FastListMixin, generics.ListAPIView):
    
     serializer_class = AppointmentAdminSerializer
+    fast_serializer_class = FastAppointmentAdminSerializer
+    pagination_class = AdminAppointmentPagination
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        queryset = Appointment.objects.select_related("doctor").order_by("-created_at")
+        queryset = Appointment.objects.select_related("doctor").order_by("-created_at", "-id")
         
         doctor_id = self.request.query_params.get('doctor')
         if doctor_id:
@@ -152,10 +478,12 @@ class AdminAppointmentDetailView(generics.RetrieveUpdateAPIView):
     queryset = Appointment.objects.select_related("doctor").all()
     
     def update(self, request, *args, **kwargs):
-        partial = kwargs.pop('partial', False)
         instance = self.get_object()
-        
-        if 'status' in request.data and len(request.data) == 1:
+
+        # Only active appointments hold their slot, so a cancelled one may
+        # already have been rebooked; it is never reactivated, whatever
+        # else the request changes.
+        if 'status' in request.data:
             new_status = request.data['status']
             
             if instance.status == 'cancelled' and new_status != 'cancelled':
@@ -166,33 +494,141 @@ class AdminAppointmentDetailView(generics.RetrieveUpdateAPIView):
         
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        try:
+            # A cancelled or moved appointment hands its slot to the
+            # waitlist once this commits (signals.slots_freed).
+            with transaction.atomic():
+                self.perform_update(serializer)
+        except IntegrityError:
+            # Moved onto a slot another active appointment holds.
+            return Response(
+                {"error": BOOKING_ERRORS[SLOT_TAKEN], "reason": SLOT_TAKEN},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         
         return Response(serializer.data)
 
 
 
 class AdminAppointmentStatsView(APIView):
+    """
+    Dashboard counts. ``?breakdown=doctor,specialization,day`` adds
+    per-group lists; the ``day`` one covers ``start``..``end`` (default:
+    the coming week).
+    """
 
     permission_classes = [IsAdminUser]
 
+    MAX_DAYS = 31
+
     def get(self, request):
-        from django.utils import timezone
+        breakdowns = [
+            name.strip() for name in request.query_params.get("breakdown", "").split(",") if name.strip()
+        ]
+        unknown = sorted(set(breakdowns) - set(BREAKDOWNS))
+        if unknown:
+            return Response(
+                {"error": f"Unknown breakdown(s): {', '.join(unknown)}. Choose from {', '.join(BREAKDOWNS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        today = timezone.now().date()
+        days = None
+        if "day" in breakdowns:
+            start_str = request.query_params.get("start")
+            end_str = request.query_params.get("end")
+            try:
+                start = (
+                    datetime.strptime(start_str, "%Y-%m-%d").date()
+                    if start_str else clinic_today(default_zone_name())
+                )
+                end = (
+                    datetime.strptime(end_str, "%Y-%m-%d").date()
+                    if end_str else start + timedelta(days=6)
+                )
+            except ValueError:
+                return Response(
+                    {"error": "Invalid date format. Use YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if end < start or (end - start).days + 1 > self.MAX_DAYS:
+                return Response(
+                    {"error": f"end must be within {self.MAX_DAYS} days on or after start"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            days = (start, end)
 
-        return Response(
-            {
-                "total_appointments": Appointment.objects.count(),
-                "pending": Appointment.objects.filter(status="pending").count(),
-                "confirmed": Appointment.objects.filter(status="confirmed").count(),
-                "cancelled": Appointment.objects.filter(status="cancelled").count(),
-                "today_appointments": Appointment.objects.filter(
-                    appointment_date=today
-                ).count(),
-                "upcoming_appointments": Appointment.objects.filter(
-                    appointment_date__gte=today,
-                    status__in=["pending", "confirmed"],
-                ).count(),
-            }
-        )
\ No newline at end of file
+        return Response(get_stats(breakdowns, days))
+
+
+class AdminAnalyticsView(APIView):
+    """
+    Appointment counts over a range of appointment dates, answered from
+    the daily rollups. ``?start=&end=`` (YYYY-MM-DD) are required;
+    ``group_by`` is day (default), hour, doctor or specialization, and
+    ``doctor``, ``specialization`` and ``consultation_type`` narrow the rows.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    MAX_DAYS = 366
+
+    def get(self, request):
+        start_str = request.query_params.get("start")
+        end_str = request.query_params.get("end")
+        if not start_str or not end_str:
+            return Response(
+                {"error": "start and end are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end = datetime.strptime(end_str, "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date format. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if end < start or (end - start).days + 1 > self.MAX_DAYS:
+            return Response(
+                {"error": f"end must be within {self.MAX_DAYS} days on or after start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        group_by = request.query_params.get("group_by", "day")
+        if group_by not in GROUP_BY:
+            return Response(
+                {"error": f"Invalid group_by. Choose from {', '.join(GROUP_BY)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        doctor_id = request.query_params.get("doctor")
+        if doctor_id:
+            try:
+                uuid.UUID(doctor_id)
+            except ValueError:
+                return Response(
+                    {"error": "Invalid doctor id"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        consultation_type = request.query_params.get("consultation_type")
+        if consultation_type and consultation_type not in CONSULTATION_MODES:
+            return Response(
+                {"error": f"Invalid consultation_type. Choose from {', '.join(CONSULTATION_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = analytics(
+            start,
+            end,
+            group_by,
+            doctor_id=doctor_id,
+            specialization=request.query_params.get("specialization"),
+            consultation_type=consultation_type,
+        )
+        return Response({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "group_by": group_by,
+            "results": results,
+        })
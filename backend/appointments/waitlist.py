@@ -0,0 +1,121 @@
+"""
+Waitlist for fully booked doctor-days.
+
+Patients queue per (doctor, date, consultation_type). Slots given up by
+a cancelled, moved or deleted appointment, a released hold or a reaped
+one are handed out right after the write that freed them commits (see
+signals.slots_freed): the oldest waiting entries of the day whose
+consultation type the doctor still offers are locked, booked through the
+booking engine and marked promoted in one batch.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from doctors.models import CONSULTATION_MODES, supports_mode_filter
+from doctors.slots import time_to_tick
+
+from .availability import doctor_zone
+from .booking import BOOKED, REJECTED, book_appointment
+from .models import WaitlistEntry
+from .zones import past_mask
+
+
+def join_waitlist(doctor_id, day, consultation_type, patient_name, patient_contact):
+    """Queue a patient. A second live entry for the same queue raises IntegrityError."""
+    return WaitlistEntry.objects.create(
+        doctor_id=doctor_id,
+        appointment_date=day,
+        consultation_type=consultation_type,
+        patient_name=patient_name,
+        patient_contact=patient_contact,
+    )
+
+
+def waitlist_position(entry):
+    """1-based place of a waiting entry in its queue, else None."""
+    if entry.status != 'waiting':
+        return None
+    return WaitlistEntry.objects.filter(
+        doctor_id=entry.doctor_id,
+        appointment_date=entry.appointment_date,
+        consultation_type=entry.consultation_type,
+        status='waiting',
+        created_at__lte=entry.created_at,
+    ).count()
+
+
+def leave_waitlist(entry_id):
+    """Take a waiting entry off its queue. Returns False if it was not waiting."""
+    return bool(
+        WaitlistEntry.objects.filter(pk=entry_id, status='waiting').update(status='left')
+    )
+
+
+def promote_waitlist(freed):
+    """
+    Offer freed slots to waiting patients. ``freed`` is an iterable of
+    ``(doctor_id, date, time)`` slot states just given up. Returns the
+    promoted entries.
+
+    Within a doctor-day, queues are served oldest entry first among the
+    consultation types the doctor offers; entries for a type they dropped
+    keep waiting. Slots that have already started are skipped, as are
+    entries the engine still rejects; a slot that turns out to be held or
+    booked again is left alone.
+    """
+    slots = defaultdict(list)
+    for doctor_id, day, slot in freed:
+        tick = time_to_tick(slot)
+        if tick is not None and not (past_mask(doctor_zone(doctor_id), day) >> tick) & 1:
+            slots[(doctor_id, day)].append(slot)
+    if not slots:
+        return []
+
+    days = Q()
+    for doctor_id, day in slots:
+        days |= Q(doctor_id=doctor_id, appointment_date=day)
+    offered = Q(pk__in=[])
+    for mode in CONSULTATION_MODES:
+        offered |= Q(consultation_type=mode) & supports_mode_filter(mode, 'doctor__')
+
+    with transaction.atomic():
+        queues = defaultdict(list)
+        for entry in (
+            WaitlistEntry.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(days, offered, status='waiting')
+            .order_by('created_at')
+        ):
+            queues[(entry.doctor_id, entry.appointment_date)].append(entry)
+
+        promoted = []
+        now = timezone.now()
+        for key, day_slots in slots.items():
+            queue = queues.get(key, [])
+            for slot in sorted(day_slots):
+                while queue:
+                    entry = queue.pop(0)
+                    result = book_appointment(
+                        entry.doctor_id,
+                        patient_name=entry.patient_name,
+                        patient_contact=entry.patient_contact,
+                        consultation_type=entry.consultation_type,
+                        appointment_date=entry.appointment_date,
+                        appointment_time=slot,
+                        alternatives=0,
+                    )
+                    if result.status == REJECTED:
+                        continue
+                    if result.status == BOOKED:
+                        entry.status = 'promoted'
+                        entry.appointment = result.appointment
+                        entry.promoted_at = now
+                        promoted.append(entry)
+                    else:
+                        queue.insert(0, entry)
+                    break
+
+        WaitlistEntry.objects.bulk_update(promoted, ['status', 'appointment', 'promoted_at'])
+    return promoted
@@ -0,0 +1,79 @@
+"""
+Clinic and client time zones for slot grids.
+
+Appointment dates and times are wall-clock values in the doctor's clinic
+zone. "Today" and "already past" are judged in that zone, and slot lists
+can be rendered in a client's zone as well.
+"""
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.utils import timezone
+
+from doctors.slots import TICKS_PER_DAY, iter_ticks, mask_before, tick_to_time
+
+ALL_TICKS = (1 << TICKS_PER_DAY) - 1
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """ZoneInfo for an IANA name; raises ValueError for unknown zones."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+def is_valid_zone(name):
+    try:
+        get_zone(name)
+    except ValueError:
+        return False
+    return True
+
+
+def default_zone_name():
+    return settings.TIME_ZONE
+
+
+def clinic_now(zone_name):
+    return timezone.now().astimezone(get_zone(zone_name))
+
+
+def clinic_today(zone_name):
+    return clinic_now(zone_name).date()
+
+
+def past_mask(zone_name, day):
+    """Ticks of ``day`` that have already started in the clinic's zone."""
+    now = clinic_now(zone_name)
+    if day < now.date():
+        return ALL_TICKS
+    if day > now.date():
+        return 0
+    return mask_before(now.time())
+
+
+def client_labels(mask, clinic_zone, client_zone, day):
+    """
+    ISO 8601 start of each tick in ``mask`` (clinic wall-clock on ``day``)
+    as seen in ``client_zone``. Only the ticks asked for are converted.
+    """
+    clinic, client = get_zone(clinic_zone), get_zone(client_zone)
+    return [
+        datetime.combine(day, tick_to_time(tick), tzinfo=clinic)
+        .astimezone(client)
+        .isoformat(timespec='minutes')
+        for tick in iter_ticks(mask)
+    ]
+
+
+def client_start(day, slot, clinic_zone, client_zone):
+    """ISO 8601 start of a clinic-local slot as seen in ``client_zone``."""
+    return (
+        datetime.combine(day, slot, tzinfo=get_zone(clinic_zone))
+        .astimezone(get_zone(client_zone))
+        .isoformat(timespec='minutes')
+    )
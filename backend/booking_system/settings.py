@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -168,8 +169,46 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'slot_holds': '10/minute',
+    },
 }
 
+# Doctor listing keeps returning a plain array unless the client opts in to
+# cursor pagination with ?cursor= or ?page_size=. Set to False to always page.
+DOCTOR_LIST_LEGACY_UNPAGINATED = True
+
+# Same for the admin appointment list.
+ADMIN_APPOINTMENT_LIST_LEGACY_UNPAGINATED = True
+
+# Maximum number of ranked rows returned for a ?q= doctor search.
+DOCTOR_SEARCH_LIMIT = 50
+
+# Doctor caches live in process memory. Point DOCTOR_CACHE_ALIAS at an entry
+# in CACHES (e.g. Redis) to share entries and invalidations across workers.
+DOCTOR_CACHE_ALIAS = None
+DOCTOR_CATALOG_TTL = 300
+DOCTOR_PROFILE_CACHE_SIZE = 2048
+DOCTOR_PROFILE_TTL = 60
+DOCTOR_SCHEDULE_CACHE_SIZE = 2048
+DOCTOR_SCHEDULE_TTL = 60
+
+# Seconds the admin dashboard counts are reused; appointment writes drop
+# them sooner.
+APPOINTMENT_STATS_TTL = 30
+
+# Fan-out for the available-slots/stream/ endpoint. The in-process broker
+# only reaches clients connected to the same server process.
+SLOT_EVENT_BROKER = 'appointments.events.InProcessBroker'
+SLOT_EVENT_KEEPALIVE = 15
+
+# How long a slot hold lasts, and how often (seconds, per process) expired
+# holds are swept from the table. manage.py reap_holds sweeps on demand.
+SLOT_HOLD_MINUTES = 5
+# Live holds one client address may keep at once.
+SLOT_HOLD_MAX_PER_CLIENT = 3
+SLOT_HOLD_REAP_INTERVAL = 60
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Doctor
+from .models import Doctor, ScheduleException, WeeklySchedule
+
+
+class WeeklyScheduleInline(admin.TabularInline):
+    model = WeeklySchedule
+    extra = 0
+    fields = ("weekday", "start_time", "end_time", "slot_minutes", "slot_count")
+    readonly_fields = ("slot_count",)
+
+
+class ScheduleExceptionInline(admin.TabularInline):
+    model = ScheduleException
+    extra = 0
+    fields = ("date", "is_day_off", "start_time", "end_time", "slot_minutes", "reason")
 
 
 @admin.register(Doctor)
@@ -40,6 +53,7 @@ class DoctorAdmin(admin.ModelAdmin):
         ("Consultation Settings", {
             "fields": (
                 "consultation_modes",
+                "timezone",
             )
         }),
         ("Metadata", {
@@ -47,4 +61,15 @@ class DoctorAdmin(admin.ModelAdmin):
         }),
     )
 
-    list_per_page = 25
\ No newline at end of file
+    inlines = (WeeklyScheduleInline, ScheduleExceptionInline)
+
+    list_per_page = 25
+
+
+@admin.register(ScheduleException)
+class ScheduleExceptionAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "date", "is_day_off", "start_time", "end_time", "reason")
+    list_filter = ("is_day_off", "date")
+    search_fields = ("doctor__name", "reason")
+    autocomplete_fields = ("doctor",)
+    ordering = ("-date",)
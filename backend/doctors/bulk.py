@@ -0,0 +1,158 @@
+import csv
+import json
+from collections import namedtuple
+
+from django.db import transaction
+
+from .catalog import invalidate_catalog
+from .models import Doctor, consultation_mode_mask
+from .serializers import DoctorAdminSerializer
+
+FORMATS = ('csv', 'ndjson')
+
+EXPORT_FIELDS = (
+    'id',
+    'name',
+    'specialization',
+    'bio',
+    'years_of_experience',
+    'consultation_modes',
+    'timezone',
+    'is_active',
+    'created_at',
+    'updated_at',
+)
+
+# consultation_modes is a list; in CSV it is written as "online;in-person".
+MODE_SEPARATOR = ';'
+
+ImportResult = namedtuple('ImportResult', ['created', 'errors'])
+
+
+def format_from_content_type(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def read_rows(lines, fmt):
+    """
+    Yield ``(line_number, row, error)`` for each record in an iterable of
+    text lines. ``row`` is a dict ready for DoctorAdminSerializer, or None
+    when the line could not be parsed.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            row = {key: value for key, value in record.items() if key and value not in ('', None)}
+            if 'consultation_modes' in row:
+                row['consultation_modes'] = [
+                    mode.strip()
+                    for mode in row['consultation_modes'].split(MODE_SEPARATOR)
+                    if mode.strip()
+                ]
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def import_doctors(rows, chunk_size=500, dry_run=False):
+    """
+    Validate ``read_rows`` output with DoctorAdminSerializer and insert the
+    valid rows with one bulk INSERT per chunk. Invalid rows are skipped and
+    reported by line number.
+    """
+    created = 0
+    errors = []
+    chunk = []
+
+    def flush():
+        nonlocal created
+        if chunk and not dry_run:
+            with transaction.atomic():
+                Doctor.objects.bulk_create(chunk, batch_size=chunk_size)
+        created += len(chunk)
+        chunk.clear()
+
+    for line_number, row, error in rows:
+        if error is not None:
+            errors.append({'line': line_number, 'errors': {'non_field_errors': [error]}})
+            continue
+
+        serializer = DoctorAdminSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'line': line_number, 'errors': serializer.errors})
+            continue
+
+        doctor = Doctor(**serializer.validated_data)
+        # bulk_create bypasses Doctor.save(), which normally sets the mask.
+        doctor.consultation_mode_mask = consultation_mode_mask(doctor._consultation_modes)
+        chunk.append(doctor)
+        if len(chunk) >= chunk_size:
+            flush()
+
+    flush()
+
+    if created and not dry_run:
+        # bulk_create sends no post_save signals.
+        invalidate_catalog()
+
+    return ImportResult(created, errors)
+
+
+class Echo:
+    """File-like object whose write() hands the value back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield export dicts using a server-side cursor so the full table is never
+    held in memory.
+    """
+    columns = [
+        '_consultation_modes' if field == 'consultation_modes' else field
+        for field in EXPORT_FIELDS
+    ]
+    rows = queryset.order_by('created_at', 'id').values_list(*columns)
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(EXPORT_FIELDS, values))
+
+
+def export_lines(queryset, fmt, chunk_size=2000):
+    """Yield the export as CSV or NDJSON text lines."""
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in export_rows(queryset, chunk_size):
+            row['consultation_modes'] = MODE_SEPARATOR.join(row['consultation_modes'] or [])
+            yield writer.writerow([_export_value(row[field]) for field in EXPORT_FIELDS])
+        return
+
+    for row in export_rows(queryset, chunk_size):
+        yield json.dumps({key: _export_value(value) for key, value in row.items()}) + '\n'
+
+
+def _export_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool, list)) or value is None:
+        return value
+    return str(value)
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+MISSING = object()
+
+
+class LocalCache:
+    """
+    Thread-safe per-process LRU cache with a fixed TTL per entry.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                return MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_shared_cache():
+    """
+    Return the Django cache configured by DOCTOR_CACHE_ALIAS, or None when
+    caching is process-local only.
+    """
+    alias = getattr(settings, 'DOCTOR_CACHE_ALIAS', None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_version(shared, key):
+    if shared is None:
+        return 0
+    version = shared.get(key)
+    if version is None:
+        shared.add(key, 1, timeout=None)
+        version = shared.get(key, 1)
+    return version
+
+
+def get_versions(shared, keys):
+    """``{key: version}`` for several version keys in one round trip."""
+    if shared is None:
+        return dict.fromkeys(keys, 0)
+    versions = shared.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_version(shared, key)
+    return versions
+
+
+def bump_version(shared, key):
+    if shared is None:
+        return
+    try:
+        shared.incr(key)
+    except ValueError:
+        shared.add(key, 1, timeout=None)
+
+
+class VersionedCache:
+    """
+    Read-through cache over a per-process LocalCache and, when configured,
+    the shared cache (see get_shared_cache).
+
+    Entries are tagged with a version kept in the shared cache, either one
+    per key or, with ``shared_version``, one for the whole cache.
+    invalidate() bumps it, so every worker skips its stale local copy on
+    the next read. Without a shared cache the version stays 0 and local
+    entries simply expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, prefix, maxsize=1024, ttl=60, shared_version=False, stats=None):
+        self.prefix = prefix
+        self.local = LocalCache(maxsize=maxsize, ttl=ttl)
+        self.shared_version = shared_version
+        self.stats = stats
+
+    def _version_key(self, key):
+        if self.shared_version:
+            return f'{self.prefix}:version'
+        return f'{self.prefix}:{key}:version'
+
+    def _value_key(self, key, version):
+        return f'{self.prefix}:{key}:v{version}'
+
+    def _record(self, outcome):
+        if self.stats is not None:
+            self.stats.record(outcome)
+
+    def get_many(self, keys, load_many):
+        """
+        Return ``{key: value}`` for string ``keys``. Whatever neither cache
+        holds comes from one ``load_many(keys)`` call, which must return a
+        value for every key it is given.
+        """
+        shared = get_shared_cache()
+        keys = list(dict.fromkeys(keys))
+        version_keys = {key: self._version_key(key) for key in keys}
+        current = get_versions(shared, list(dict.fromkeys(version_keys.values())))
+        values = {}
+        versions = {}
+        for key in keys:
+            version = current[version_keys[key]]
+            cached = self.local.get(key)
+            if cached is not MISSING and cached[0] == version:
+                self._record('local_hits')
+                values[key] = cached[1]
+            else:
+                versions[key] = version
+
+        if shared is not None and versions:
+            found = shared.get_many([self._value_key(key, version) for key, version in versions.items()])
+            for key, version in list(versions.items()):
+                value_key = self._value_key(key, version)
+                if value_key in found:
+                    self._record('shared_hits')
+                    self.local.set(key, (version, found[value_key]))
+                    values[key] = found[value_key]
+                    del versions[key]
+
+        if versions:
+            loaded = load_many(list(versions))
+            for key, version in versions.items():
+                self._record('misses')
+                self.local.set(key, (version, loaded[key]))
+                values[key] = loaded[key]
+            if shared is not None:
+                shared.set_many(
+                    {self._value_key(key, version): loaded[key] for key, version in versions.items()},
+                    self.local.ttl,
+                )
+        return values
+
+    def get(self, key, load):
+        """Return the value for ``key``, calling ``load(key)`` on a miss."""
+        return self.get_many([key], lambda keys: {key: load(key)})[key]
+
+    def invalidate(self, key=None):
+        """Drop ``key``, or with ``shared_version`` every key."""
+        if self.shared_version:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+        bump_version(get_shared_cache(), self._version_key(key))
+
+    def __len__(self):
+        return len(self.local)
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            hits = self.local_hits + self.shared_hits
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            }
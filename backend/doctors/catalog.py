@@ -0,0 +1,46 @@
+import hashlib
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count
+
+from .cache import VersionedCache
+from .models import Doctor
+
+CATALOG_KEY = 'doctors:specialization-catalog'
+
+Catalog = namedtuple('Catalog', ['items', 'names', 'digest'])
+
+_cache = VersionedCache(
+    CATALOG_KEY,
+    maxsize=1,
+    ttl=getattr(settings, 'DOCTOR_CATALOG_TTL', 300),
+    shared_version=True,
+)
+
+
+def build_catalog():
+    items = list(
+        Doctor.objects.filter(is_active=True)
+        .values('specialization')
+        .annotate(doctor_count=Count('id'))
+        .order_by('specialization')
+    )
+    names = [item['specialization'] for item in items]
+    digest = hashlib.md5(
+        json.dumps(items, separators=(',', ':')).encode()
+    ).hexdigest()
+    return Catalog(items, names, digest)
+
+
+def get_catalog():
+    """
+    Return the active specialization catalog with per-specialization doctor
+    counts, served from process memory and, if configured, the shared cache.
+    """
+    return _cache.get('active', lambda key: build_catalog())
+
+
+def invalidate_catalog():
+    _cache.invalidate()
@@ -0,0 +1,84 @@
+import hashlib
+
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Doctor
+
+
+def weak_etag(*parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the request's validators still match, else None.
+    ``last_modified`` is a Unix timestamp.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the body but always revalidate it.
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def query_fingerprint(request):
+    return sorted(request.query_params.lists())
+
+
+class ConditionalListMixin:
+    """
+    Answers If-None-Match / If-Modified-Since for doctor list views before
+    any row is serialized. The ETag covers the filtered rows' newest
+    ``updated_at``, their count, the query parameters and any
+    extra_validator_state(). Goes before FastListMixin, whose
+    list_response() renders the same filtered queryset.
+    """
+
+    def extra_validator_state(self, request):
+        """
+        Further ETag parts for response data that does not live on the
+        rows. Such data has no modification time, so a non-empty result
+        also drops Last-Modified.
+        """
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # One query: the filtered rows, and the whole table for
+        # Last-Modified, which must move when a doctor leaves the filtered
+        # set too.
+        visible = Q(pk__in=queryset.values('pk'))
+        state = Doctor.objects.aggregate(
+            last=Max('updated_at', filter=visible),
+            count=Count('pk', filter=visible),
+            table_last=Max('updated_at'),
+        )
+        extra = self.extra_validator_state(request)
+        etag = weak_etag(
+            state['last'] and state['last'].isoformat(),
+            state['count'],
+            query_fingerprint(request),
+            *extra,
+        )
+        last_modified = None
+        if not extra and state['table_last']:
+            last_modified = int(state['table_last'].timestamp())
+
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = self.list_response(queryset)
+            set_validators(response, etag, last_modified)
+        return response
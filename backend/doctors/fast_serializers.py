@@ -0,0 +1,307 @@
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+def as_str(value):
+    return None if value is None else str(value)
+
+
+def as_iso(value):
+    return None if value is None else value.isoformat()
+
+
+def as_datetime(value, tz):
+    # Mirrors DRF's DateTimeField: current timezone, ISO 8601, "Z" for UTC.
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+# Resolving the active timezone is costly, so it is looked up once per batch
+# and passed to converters that ask for it.
+as_datetime.needs_timezone = True
+
+
+def as_list(value):
+    return None if value is None else list(value)
+
+
+class Field:
+    """
+    One output key of a fast serializer.
+
+    ``source`` is the ``.values()`` column it reads, ``convert`` an optional
+    callable applied to the raw value, and ``nested`` a FastSerializer
+    subclass whose columns are read through the ``source`` relation. Nested
+    fields with ``sideload_as`` can be expanded into a separate map keyed by
+    id instead of being repeated inline.
+    """
+
+    __slots__ = ('name', 'source', 'convert', 'nested', 'sideload_as')
+
+    def __init__(self, name, source=None, convert=None, nested=None, sideload_as=None):
+        self.name = name
+        self.source = source or name
+        self.convert = convert
+        self.nested = nested
+        self.sideload_as = sideload_as
+
+
+def compile_builder(fields, prefix=''):
+    """
+    Generate ``build(row, nested, tz)`` returning the output dict for one
+    ``.values()`` row, with every key lookup and conversion inlined.
+    """
+    namespace = {}
+    items = []
+    nested_index = 0
+
+    for index, field in enumerate(fields):
+        key = prefix + field.source
+        if field.nested is not None:
+            expr = f'nested[{nested_index}](row)'
+            nested_index += 1
+        elif getattr(field.convert, 'needs_timezone', False):
+            namespace[f'c{index}'] = field.convert
+            expr = f'c{index}(row[{key!r}], tz)'
+        elif field.convert is not None:
+            namespace[f'c{index}'] = field.convert
+            expr = f'c{index}(row[{key!r}])'
+        else:
+            expr = f'row[{key!r}]'
+        items.append(f'{field.name!r}: {expr}')
+
+    source = 'def build(row, nested, tz):\n    return {%s}\n' % ', '.join(items)
+    exec(compile(source, '<fast-serializer>', 'exec'), namespace)
+    return namespace['build']
+
+
+@lru_cache(maxsize=None)
+def get_builder(serializer_class, prefix, names):
+    field_map = serializer_class.field_map()
+    return compile_builder([field_map[name] for name in names], prefix)
+
+
+class FastSerializer:
+    """
+    Read-only serializer that builds response dicts straight from
+    ``.values()`` rows. Output is identical to the matching DRF serializer
+    but skips per-row field introspection.
+
+    ``fields``/``exclude`` narrow the output (and the selected columns);
+    ``expand`` names nested fields to side-load, plus any ``expandable``
+    fields that are only present when asked for.
+    """
+
+    fields = ()
+    expandable = ()
+
+    def __init__(self, prefix='', fields=None, exclude=None, expand=None):
+        self.prefix = prefix
+        self.expand = set(expand or ())
+        self.selected = self.select_fields(fields, exclude, self.expand)
+        self._build = get_builder(
+            self.__class__, prefix, tuple(field.name for field in self.selected)
+        )
+        self._nested = [
+            (field, field.nested(prefix + field.source + '__'), prefix + field.source)
+            for field in self.selected
+            if field.nested is not None
+        ]
+        self.sideloaded = {}
+
+    @classmethod
+    def field_map(cls):
+        return {field.name: field for field in cls.fields + cls.expandable}
+
+    @classmethod
+    def select_fields(cls, only, exclude, expand):
+        field_map = cls.field_map()
+
+        unknown = (set(only or ()) | set(exclude or ())) - set(field_map)
+        if unknown:
+            raise ValidationError({
+                'fields': f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                          f"Available: {', '.join(field_map)}"
+            })
+
+        expandable = {name for name, field in field_map.items() if field.sideload_as}
+        if expand - expandable:
+            raise ValidationError({
+                'expand': f"Cannot expand: {', '.join(sorted(expand - expandable))}"
+            })
+
+        selected = list(cls.fields) + [f for f in cls.expandable if f.name in expand]
+        if only:
+            selected = [field for field in selected if field.name in only]
+        if exclude:
+            selected = [field for field in selected if field.name not in exclude]
+        return selected
+
+    def values_fields(self):
+        columns = []
+        for field in self.selected:
+            # For nested fields the foreign key column doubles as the key for
+            # sharing output between rows.
+            columns.append(self.prefix + field.source)
+            if field.nested is not None:
+                columns.extend(field.nested(self.prefix + field.source + '__').values_fields())
+        return columns
+
+    def nested_builders(self, tz):
+        # Related objects are serialized once per batch and shared by every
+        # row that points at them.
+        builders = []
+        for field, serializer, key in self._nested:
+            if field.name in self.expand:
+                target = self.sideloaded.setdefault(field.sideload_as, {})
+                builders.append(self._sideload(serializer, key, tz, target))
+            else:
+                builders.append(self._memoize(serializer, key, tz))
+        return builders
+
+    @staticmethod
+    def _memoize(serializer, key, tz):
+        build = serializer._build
+        nested = serializer.nested_builders(tz)
+        memo = {}
+
+        def get(row):
+            pk = row[key]
+            if pk is None:
+                return None
+            data = memo.get(pk)
+            if data is None:
+                data = memo[pk] = build(row, nested, tz)
+            return data
+
+        return get
+
+    @staticmethod
+    def _sideload(serializer, key, tz, target):
+        build = serializer._build
+        nested = serializer.nested_builders(tz)
+
+        def get(row):
+            pk = row[key]
+            if pk is None:
+                return None
+            pk = str(pk)
+            if pk not in target:
+                target[pk] = build(row, nested, tz)
+            return pk
+
+        return get
+
+    def build_one(self, row):
+        tz = timezone.get_current_timezone()
+        self.sideloaded = {}
+        return self._build(row, self.nested_builders(tz), tz)
+
+    def serialize(self, rows):
+        tz = timezone.get_current_timezone()
+        self.sideloaded = {}
+        build = self._build
+        nested = self.nested_builders(tz)
+        return [build(row, nested, tz) for row in rows]
+
+
+class FastDoctorListSerializer(FastSerializer):
+    """Fast path equivalent of DoctorListSerializer."""
+
+    fields = (
+        Field('id', convert=as_str),
+        Field('name'),
+        Field('specialization'),
+        Field('years_of_experience'),
+        Field('consultation_modes', '_consultation_modes', as_list),
+        Field('is_available', 'is_active'),
+    )
+
+
+class FastDoctorDetailSerializer(FastSerializer):
+    """Fast path equivalent of DoctorDetailSerializer."""
+
+    fields = (
+        Field('id', convert=as_str),
+        Field('name'),
+        Field('specialization'),
+        Field('bio'),
+        Field('years_of_experience'),
+        Field('consultation_modes', '_consultation_modes', as_list),
+        Field('timezone'),
+        Field('is_available', 'is_active'),
+    )
+
+
+class FastDoctorAvailabilitySerializer(FastSerializer):
+    """Doctor list rows annotated with ``free_slots`` for a requested day."""
+
+    fields = FastDoctorListSerializer.fields + (
+        Field('free_slots'),
+    )
+
+
+def split_param(value):
+    if not value:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+class FastSerializerMixin:
+    """
+    Builds ``fast_serializer_class`` with the request's ``fields``,
+    ``exclude`` and ``expand`` query parameters.
+    """
+
+    fast_serializer_class = None
+
+    def get_fast_serializer_class(self):
+        return self.fast_serializer_class
+
+    def get_fast_serializer(self):
+        params = self.request.query_params
+        return self.get_fast_serializer_class()(
+            fields=split_param(params.get('fields')),
+            exclude=split_param(params.get('exclude')),
+            expand=split_param(params.get('expand')),
+        )
+
+
+class FastListMixin(FastSerializerMixin):
+    """
+    ListModelMixin replacement that pages and serializes ``.values()`` rows
+    with ``fast_serializer_class``. Side-loaded objects are added next to
+    ``results``.
+    """
+
+    pagination_fields = ('created_at', 'id')
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        """The list response for an already filtered ``queryset``."""
+        serializer = self.get_fast_serializer()
+        columns = serializer.values_fields()
+
+        page = None
+        if self.paginator is not None:
+            extra = [name for name in self.pagination_fields if name not in columns]
+            page = self.paginate_queryset(queryset.values(*columns, *extra))
+        if page is not None:
+            response = self.get_paginated_response(serializer.serialize(page))
+            response.data.update(serializer.sideloaded)
+            return response
+
+        data = serializer.serialize(queryset.values(*columns))
+        if serializer.sideloaded:
+            return Response({'results': data, **serializer.sideloaded})
+        return Response(data)
+
@@ -0,0 +1,111 @@
+import time
+import uuid
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from appointments.fast_serializers import FastAppointmentDetailSerializer
+from appointments.models import Appointment
+from appointments.serializers import AppointmentDetailSerializer
+from doctors.fast_serializers import FastDoctorDetailSerializer, FastDoctorListSerializer
+from doctors.models import Doctor
+from doctors.serializers import DoctorDetailSerializer, DoctorListSerializer
+
+
+def make_doctor(index):
+    now = timezone.now()
+    return Doctor(
+        id=uuid.uuid4(),
+        name=f'Doctor {index}',
+        specialization=('Cardiology', 'Dermatology', 'Neurology')[index % 3],
+        bio='Experienced physician. ' * 4,
+        years_of_experience=index % 40,
+        _consultation_modes=['online', 'in-person'][:1 + index % 2],
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def make_appointment(index, doctor):
+    return Appointment(
+        id=uuid.uuid4(),
+        doctor=doctor,
+        patient_name=f'Patient {index}',
+        patient_contact=f'98765{index:05d}',
+        consultation_type='online',
+        appointment_date=date(2026, 1, 1) + timedelta(days=index % 60),
+        appointment_time=dt_time(9 + index % 8, 30 * (index % 2)),
+        status='pending',
+        created_at=timezone.now(),
+    )
+
+
+def as_values_row(obj, columns):
+    # What ``.values(*columns)`` would have returned for this instance.
+    row = {}
+    for column in columns:
+        target = obj
+        *path, name = column.split('__')
+        for step in path:
+            target = getattr(target, step)
+        field = target._meta.get_field(name)
+        row[column] = getattr(target, field.attname)
+    return row
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the DRF serializers and the fast read path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+
+        for size in options['sizes']:
+            doctors = [make_doctor(i) for i in range(size)]
+            appointments = [
+                make_appointment(i, doctors[i % min(size, 100)]) for i in range(size)
+            ]
+            cases = [
+                ('doctor list', DoctorListSerializer, FastDoctorListSerializer, doctors),
+                ('doctor detail', DoctorDetailSerializer, FastDoctorDetailSerializer, doctors),
+                ('appointment detail', AppointmentDetailSerializer,
+                 FastAppointmentDetailSerializer, appointments),
+            ]
+
+            for label, drf_class, fast_class, objects in cases:
+                fast = fast_class()
+                columns = fast.values_fields()
+                rows = [as_values_row(obj, columns) for obj in objects]
+
+                drf_data, drf_seconds = self.timed(
+                    lambda: drf_class(objects, many=True).data, options['repeat']
+                )
+                fast_data, fast_seconds = self.timed(
+                    lambda: fast.serialize(rows), options['repeat']
+                )
+
+                if renderer.render(drf_data) != renderer.render(fast_data):
+                    raise CommandError(f'{label}: fast path output differs from DRF')
+
+                self.stdout.write(
+                    f'{label:<20} {size:>7} rows  '
+                    f'drf {size / drf_seconds:>11,.0f} rows/s  '
+                    f'fast {size / fast_seconds:>11,.0f} rows/s  '
+                    f'x{drf_seconds / fast_seconds:.1f}'
+                )
+
+    @staticmethod
+    def timed(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
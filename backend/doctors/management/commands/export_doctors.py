@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from doctors.bulk import FORMATS, export_lines
+from doctors.models import Doctor
+
+
+class Command(BaseCommand):
+    help = 'Stream all doctors to a CSV or NDJSON file (or stdout).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File path; defaults to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lines = export_lines(Doctor.objects.all(), options['format'], options['chunk_size'])
+
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+            for line in lines:
+                handle.write(line)
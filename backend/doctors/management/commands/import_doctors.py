@@ -0,0 +1,40 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from doctors.bulk import FORMATS, import_doctors, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create doctors from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Validate without inserting.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            extension = os.path.splitext(path)[1].lower()
+            fmt = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}.get(extension)
+        if fmt is None:
+            raise CommandError('Cannot infer the format; pass --format csv or --format ndjson')
+
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            result = import_doctors(
+                read_rows(handle, fmt),
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(f'{verb} {result.created} doctors, {len(result.errors)} rows failed')
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-01-20 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0002_remove_doctor_consultation_modes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='doctor_active_keyset_idx'),
+        ),
+    ]
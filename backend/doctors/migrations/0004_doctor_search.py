@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-01-21 09:30
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+SEARCH_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION doctors_doctor_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.specialization, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.bio, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER doctors_doctor_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON doctors_doctor
+    FOR EACH ROW EXECUTE FUNCTION doctors_doctor_search_vector_update()
+    """,
+    # Fires the trigger once for every existing row.
+    "UPDATE doctors_doctor SET name = name",
+    "CREATE INDEX doctor_search_vector_idx ON doctors_doctor USING gin (search_vector)",
+    "CREATE INDEX doctor_name_trgm_idx ON doctors_doctor USING gin (name gin_trgm_ops)",
+    "CREATE INDEX doctor_spec_trgm_idx ON doctors_doctor USING gin (specialization gin_trgm_ops)",
+]
+
+REVERSE_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS doctor_spec_trgm_idx",
+    "DROP INDEX IF EXISTS doctor_name_trgm_idx",
+    "DROP INDEX IF EXISTS doctor_search_vector_idx",
+    "DROP TRIGGER IF EXISTS doctors_doctor_search_vector_trigger ON doctors_doctor",
+    "DROP FUNCTION IF EXISTS doctors_doctor_search_vector_update()",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in REVERSE_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0003_doctor_active_keyset_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='doctor',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-01-22 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0004_doctor_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='doctor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-01-23 14:20
+
+from django.db import migrations, models
+
+
+# Frozen copy of doctors.models.CONSULTATION_MODES at the time of writing.
+CONSULTATION_MODES = ('online', 'in-person')
+
+
+def backfill_mode_mask(apps, schema_editor):
+    Doctor = apps.get_model('doctors', 'Doctor')
+    batch = []
+    for doctor in Doctor.objects.only('id', '_consultation_modes').iterator(chunk_size=1000):
+        mask = 0
+        for mode in doctor._consultation_modes or []:
+            if mode in CONSULTATION_MODES:
+                mask |= 1 << CONSULTATION_MODES.index(mode)
+        doctor.consultation_mode_mask = mask
+        batch.append(doctor)
+        if len(batch) >= 1000:
+            Doctor.objects.bulk_update(batch, ['consultation_mode_mask'])
+            batch = []
+    if batch:
+        Doctor.objects.bulk_update(batch, ['consultation_mode_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0005_doctor_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='consultation_mode_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_mode_mask, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['consultation_mode_mask', 'is_active'], name='doctor_mode_mask_idx'),
+        ),
+    ]
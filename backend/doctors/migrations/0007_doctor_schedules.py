@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-01-24 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0006_doctor_consultation_mode_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('slot_count', models.PositiveSmallIntegerField(default=0, editable=False)),
+                ('date', models.DateField()),
+                ('is_day_off', models.BooleanField(default=False)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='doctors.doctor')),
+            ],
+            options={
+                'db_table': 'doctors_schedule_exception',
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['doctor', 'date'], name='schedule_exception_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklySchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('slot_count', models.PositiveSmallIntegerField(default=0, editable=False)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_schedule', to='doctors.doctor')),
+            ],
+            options={
+                'db_table': 'doctors_weekly_schedule',
+                'ordering': ['weekday', 'start_time'],
+                'indexes': [models.Index(fields=['doctor', 'weekday'], name='weekly_schedule_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-01-27 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0007_doctor_schedules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='timezone',
+            field=models.CharField(default='UTC', max_length=64),
+        ),
+    ]
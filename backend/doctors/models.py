@@ -1,6 +1,38 @@
 import uuid
 import json
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+
+from .slots import TICK_MINUTES, grid_for, time_to_tick
+
+# Order matters: a mode's position is its bit in consultation_mode_mask.
+CONSULTATION_MODES = ('online', 'in-person')
+
+
+def consultation_mode_bit(mode):
+    return 1 << CONSULTATION_MODES.index(mode)
+
+
+def consultation_mode_mask(modes):
+    mask = 0
+    for mode in modes or []:
+        if mode in CONSULTATION_MODES:
+            mask |= consultation_mode_bit(mode)
+    return mask
+
+
+def supports_mode_filter(mode, prefix=''):
+    """
+    Q matching doctors offering ``mode``, on Doctor fields reached through
+    ``prefix`` (e.g. "doctor__"). With two modes only a handful of mask
+    values qualify, so this is an indexed IN lookup.
+    """
+    bit = consultation_mode_bit(mode)
+    masks = [mask for mask in range(1, 1 << len(CONSULTATION_MODES)) if mask & bit]
+    return Q(**{f'{prefix}consultation_mode_mask__in': masks})
+
 
 class Doctor(models.Model):
 
@@ -11,20 +43,44 @@ class Doctor(models.Model):
     years_of_experience = models.IntegerField()
     
     _consultation_modes = models.JSONField(default=list)
+    consultation_mode_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    # IANA name of the clinic's zone; appointment dates and times are
+    # wall-clock values in this zone.
+    timezone = models.CharField(max_length=64, default='UTC')
     
     is_active = models.BooleanField(default=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Weighted tsvector over name/specialization/bio, kept current by a
+    # PostgreSQL trigger (see migration 0004). Unused on other databases.
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         db_table = 'doctors_doctor'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['specialization', 'is_active']),
+            models.Index(
+                fields=['is_active', 'created_at', 'id'],
+                name='doctor_active_keyset_idx'
+            ),
+            models.Index(
+                fields=['consultation_mode_mask', 'is_active'],
+                name='doctor_mode_mask_idx'
+            ),
         ]
     
     def __str__(self):
         return f"Dr. {self.name} - {self.specialization}"
+
+    def save(self, *args, **kwargs):
+        self.consultation_mode_mask = consultation_mode_mask(self._consultation_modes)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and '_consultation_modes' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'consultation_mode_mask'}
+        super().save(*args, **kwargs)
     
     @property
     def consultation_modes(self):
@@ -36,6 +92,11 @@ class Doctor(models.Model):
         """Set consultation modes"""
         self._consultation_modes = value
     
+    def supports_mode(self, mode):
+        return mode in CONSULTATION_MODES and bool(
+            self.consultation_mode_mask & consultation_mode_bit(mode)
+        )
+
     @property
     def is_available(self):
         """
@@ -43,4 +104,113 @@ class Doctor(models.Model):
         Currently based on is_active status.
         Can be extended to check time-based availability.
         """
-        return self.is_active
\ No newline at end of file
+        return self.is_active
+
+
+WEEKDAYS = (
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+)
+
+
+class ScheduleBlock(models.Model):
+    """
+    A span of working hours cut into ``slot_minutes`` visits. ``slot_count``
+    is stored so availability queries can sum a day's capacity in SQL.
+    """
+
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    slot_count = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def block(self):
+        return (self.start_time, self.end_time, self.slot_minutes)
+
+    def has_hours(self):
+        return True
+
+    def clean(self):
+        super().clean()
+        if not self.has_hours():
+            return
+        if self.start_time is None or self.end_time is None:
+            raise ValidationError('Start and end time are required.')
+        if self.end_time <= self.start_time:
+            raise ValidationError({'end_time': 'End time must be after start time.'})
+        if time_to_tick(self.start_time) is None or time_to_tick(self.end_time) is None:
+            raise ValidationError(f'Times must fall on {TICK_MINUTES}-minute boundaries.')
+        if not self.slot_minutes or self.slot_minutes % TICK_MINUTES:
+            raise ValidationError(
+                {'slot_minutes': f'Slot length must be a multiple of {TICK_MINUTES} minutes.'}
+            )
+
+    def save(self, *args, **kwargs):
+        self.slot_count = len(grid_for((self.block(),))) if self.has_hours() else 0
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'slot_count'}
+        super().save(*args, **kwargs)
+
+
+class WeeklySchedule(ScheduleBlock):
+    """
+    Recurring working hours for one weekday. A day may have several blocks
+    (e.g. around a lunch break). Doctors with no rows work the default
+    09:00-17:00 grid every day; once any row exists, weekdays without rows
+    are days off.
+    """
+
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name='weekly_schedule'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        db_table = 'doctors_weekly_schedule'
+        ordering = ['weekday', 'start_time']
+        indexes = [
+            models.Index(fields=['doctor', 'weekday'], name='weekly_schedule_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class ScheduleException(ScheduleBlock):
+    """
+    Overrides the weekly hours on one date: either a day off or one or more
+    custom blocks, which replace that weekday's template entirely.
+    """
+
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name='schedule_exceptions'
+    )
+    date = models.DateField()
+    is_day_off = models.BooleanField(default=False)
+    reason = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        db_table = 'doctors_schedule_exception'
+        ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['doctor', 'date'], name='schedule_exception_date_idx'),
+        ]
+
+    def __str__(self):
+        if self.is_day_off:
+            return f"{self.date} day off"
+        return f"{self.date} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    def has_hours(self):
+        return not self.is_day_off
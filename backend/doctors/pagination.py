@@ -0,0 +1,181 @@
+import base64
+import binascii
+import json
+import uuid
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first cursor pagination over the unique (created_at, id) key.
+
+    Pages are located with a WHERE on the last row seen instead of an
+    OFFSET, so page N costs the same as page 1. Cursors are opaque
+    base64 tokens.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = position is not None
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def paginate_as_one_page(self, queryset, request):
+        """
+        Like paginate_queryset for a queryset that is already ordered and
+        capped some other way, such as search results by relevance: all
+        of it comes back as a single page with no next or previous link.
+        """
+        if not self.is_requested(request):
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.page = list(queryset)
+        self.has_next = self.has_previous = False
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def seek(self, position, reverse):
+        # "created_at <= x" alone is an index range condition; the OR only
+        # filters rows sharing the boundary timestamp.
+        created_at, pk = position
+        if reverse:
+            return Q(created_at__gte=created_at) & (
+                Q(created_at__gt=created_at) | Q(id__gt=pk)
+            )
+        return Q(created_at__lte=created_at) & (
+            Q(created_at__lt=created_at) | Q(id__lt=pk)
+        )
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return item['created_at'], item['id']
+        return item.created_at, item.pk
+
+    def encode_cursor(self, item, reverse):
+        created_at, pk = self.get_position(item)
+        payload = json.dumps([created_at.isoformat(), str(pk), int(reverse)])
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            created_at, pk, reverse = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(created_at, str) or not isinstance(pk, str):
+                raise ValueError('cursor fields must be strings')
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return (created_at, pk), bool(reverse)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptInKeysetPagination(KeysetPagination):
+    """
+    KeysetPagination for listings that used to return everything.
+
+    While the boolean setting named by ``legacy_setting`` is on (the
+    default), clients get the old plain array unless they opt in with
+    ?cursor= or ?page_size=.
+    """
+
+    legacy_setting = None
+
+    def is_requested(self, request):
+        if not getattr(settings, self.legacy_setting, True):
+            return True
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+
+class DoctorCursorPagination(OptInKeysetPagination):
+    """Keyset pagination for the public doctor listing."""
+
+    legacy_setting = 'DOCTOR_LIST_LEGACY_UNPAGINATED'
@@ -0,0 +1,74 @@
+from collections import namedtuple
+
+from django.conf import settings
+
+from .cache import CacheStats, VersionedCache
+from .fast_serializers import FastDoctorDetailSerializer
+from .models import CONSULTATION_MODES, Doctor, consultation_mode_bit
+
+PROFILE_KEY = 'doctors:profile'
+
+
+class DoctorProfile(namedtuple(
+    'DoctorProfile',
+    ['data', 'name', 'is_active', 'consultation_mode_mask', 'timezone', 'updated_at'],
+)):
+    """
+    Cached view of one doctor. ``data`` is the public DoctorDetailSerializer
+    payload; the other fields are what booking validation, clinic-local
+    slot rendering and conditional GETs need.
+    """
+
+    __slots__ = ()
+
+    def supports_mode(self, mode):
+        return mode in CONSULTATION_MODES and bool(
+            self.consultation_mode_mask & consultation_mode_bit(mode)
+        )
+
+stats = CacheStats()
+_cache = VersionedCache(
+    PROFILE_KEY,
+    maxsize=getattr(settings, 'DOCTOR_PROFILE_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'DOCTOR_PROFILE_TTL', 60),
+    stats=stats,
+)
+
+
+def load_profile(pk):
+    serializer = FastDoctorDetailSerializer()
+    row = (
+        Doctor.objects.filter(pk=pk)
+        .values(*serializer.values_fields(), 'consultation_mode_mask', 'updated_at')
+        .first()
+    )
+    if row is None:
+        return None
+    return DoctorProfile(
+        data=serializer.build_one(row),
+        name=row['name'],
+        is_active=row['is_active'],
+        consultation_mode_mask=row['consultation_mode_mask'],
+        timezone=row['timezone'],
+        updated_at=row['updated_at'],
+    )
+
+
+def get_profile(pk):
+    """
+    Return the DoctorProfile for ``pk`` (None if no such doctor), reading
+    through the per-process LRU, then the shared cache, then the database.
+
+    With a shared cache, every lookup checks the doctor's version key so a
+    save in any worker is seen immediately; otherwise local entries live
+    for DOCTOR_PROFILE_TTL seconds.
+    """
+    return _cache.get(str(pk), load_profile)
+
+
+def invalidate_profile(pk):
+    _cache.invalidate(str(pk))
+
+
+def profile_cache_stats():
+    return {**stats.as_dict(), 'local_size': len(_cache)}
@@ -0,0 +1,180 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, ExtractHour, ExtractMinute, Greatest, Mod
+from django.utils import timezone
+
+from .cache import VersionedCache
+from .models import ScheduleException, WeeklySchedule
+from .slots import DEFAULT_GRID, TICK_MINUTES, grid_for
+
+SCHEDULE_KEY = 'doctors:schedule'
+
+
+class DoctorSchedule(namedtuple('DoctorSchedule', ['weekly', 'exceptions'])):
+    """
+    A doctor's expanded slot templates. ``weekly`` holds one SlotGrid per
+    weekday (Monday first), or is None when the doctor has no weekly rows
+    and works the default grid; ``exceptions`` maps dates to SlotGrids.
+    """
+
+    __slots__ = ()
+
+    def grid(self, day):
+        grid = self.exceptions.get(day)
+        if grid is not None:
+            return grid
+        if self.weekly is None:
+            return DEFAULT_GRID
+        return self.weekly[day.weekday()]
+
+
+_cache = VersionedCache(
+    SCHEDULE_KEY,
+    maxsize=getattr(settings, 'DOCTOR_SCHEDULE_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'DOCTOR_SCHEDULE_TTL', 60),
+)
+
+
+def load_schedules(doctor_ids):
+    """
+    Build DoctorSchedules for ``doctor_ids`` with two queries. Exceptions
+    before yesterday are skipped; nobody books into the past.
+    """
+    doctor_ids = [str(pk) for pk in doctor_ids]
+    weekly = defaultdict(lambda: defaultdict(list))
+    for doctor_id, weekday, *block in WeeklySchedule.objects.filter(
+        doctor_id__in=doctor_ids
+    ).values_list('doctor_id', 'weekday', 'start_time', 'end_time', 'slot_minutes'):
+        weekly[str(doctor_id)][weekday].append(tuple(block))
+
+    exceptions = defaultdict(lambda: defaultdict(list))
+    since = timezone.localdate() - timedelta(days=1)
+    for doctor_id, day, is_day_off, *block in ScheduleException.objects.filter(
+        doctor_id__in=doctor_ids, date__gte=since
+    ).values_list('doctor_id', 'date', 'is_day_off', 'start_time', 'end_time', 'slot_minutes'):
+        blocks = exceptions[str(doctor_id)][day]
+        if not is_day_off:
+            blocks.append(tuple(block))
+
+    schedules = {}
+    for doctor_id in doctor_ids:
+        days = weekly.get(doctor_id)
+        schedules[doctor_id] = DoctorSchedule(
+            weekly=None if days is None else tuple(
+                grid_for(tuple(days.get(weekday, ()))) for weekday in range(7)
+            ),
+            exceptions={
+                day: grid_for(tuple(blocks))
+                for day, blocks in exceptions.get(doctor_id, {}).items()
+            },
+        )
+    return schedules
+
+
+def get_schedules(doctor_ids):
+    """
+    Return ``{str(doctor_id): DoctorSchedule}``, reading through the
+    per-process LRU, the shared cache and finally one batched load for
+    whatever is left.
+    """
+    return _cache.get_many([str(pk) for pk in doctor_ids], load_schedules)
+
+
+def get_schedule(doctor_id):
+    return get_schedules([doctor_id])[str(doctor_id)]
+
+
+def get_day_grid(doctor_id, day):
+    """The SlotGrid a doctor works on ``day``."""
+    return get_schedule(doctor_id).grid(day)
+
+
+def invalidate_schedule(pk):
+    _cache.invalidate(str(pk))
+
+
+def minute_of_day(field):
+    """SQL minutes since midnight of a time column, as an integer."""
+    # PostgreSQL's EXTRACT returns numeric; divisions below must truncate.
+    return Cast(ExtractHour(field) * 60 + ExtractMinute(field), IntegerField())
+
+
+def _slots_from(from_tick):
+    """
+    SQL count of a block's slots starting at or after ``from_tick``; all
+    of them (``slot_count``) when that is midnight.
+    """
+    if not from_tick:
+        return F('slot_count')
+    # Slots before the cutoff: ceil((cutoff - start) / step), at least 0.
+    start = Coalesce(minute_of_day('start_time'), Value(0))
+    skipped = (Value(from_tick * TICK_MINUTES) - start + F('slot_minutes') - 1) / F('slot_minutes')
+    return Greatest(F('slot_count') - Greatest(skipped, Value(0)), Value(0))
+
+
+def _slot_sum(queryset, from_tick):
+    return Subquery(
+        queryset.order_by().values('doctor').annotate(total=Sum(_slots_from(from_tick))).values('total'),
+        output_field=IntegerField(),
+    )
+
+
+def slot_capacity(day, from_tick=0):
+    """
+    Number of slots each doctor (the outer query's ``pk``) offers on
+    ``day`` that start at or after tick ``from_tick``: from the date's
+    exceptions if any, else the weekday template, else the default grid
+    for doctors without a weekly schedule.
+    """
+    return Coalesce(
+        _slot_sum(ScheduleException.objects.filter(doctor=OuterRef('pk'), date=day), from_tick),
+        _slot_sum(WeeklySchedule.objects.filter(doctor=OuterRef('pk'), weekday=day.weekday()), from_tick),
+        Case(
+            When(Exists(WeeklySchedule.objects.filter(doctor=OuterRef('pk'))), then=Value(0)),
+            default=Value((DEFAULT_GRID.mask >> from_tick).bit_count()),
+        ),
+        output_field=IntegerField(),
+    )
+
+
+def _fitting(blocks):
+    """Blocks with a slot starting at the outer query's ``slot_minute``."""
+    slot_minute = ExpressionWrapper(OuterRef('slot_minute'), output_field=IntegerField())
+    return (
+        blocks.annotate(start=minute_of_day('start_time'), end=minute_of_day('end_time'))
+        .annotate(offset=Mod(slot_minute - F('start'), F('slot_minutes'), output_field=IntegerField()))
+        .filter(start__lte=slot_minute, end__gte=slot_minute + F('slot_minutes'), offset=0)
+    )
+
+
+def on_grid(queryset, day, slot_field='appointment_time'):
+    """
+    Keep the rows of ``queryset`` (anything with a ``doctor`` and a
+    ``slot_field`` time on ``day``) whose time is a slot of their doctor's
+    grid for ``day``, picked the way DoctorSchedule.grid picks it.
+    """
+    exceptions = ScheduleException.objects.filter(doctor=OuterRef('doctor_id'), date=day)
+    weekly = WeeklySchedule.objects.filter(doctor=OuterRef('doctor_id'))
+    default_minutes = [tick * TICK_MINUTES for tick in DEFAULT_GRID.ticks]
+    return queryset.annotate(slot_minute=minute_of_day(slot_field)).filter(
+        Q(Exists(_fitting(exceptions.filter(is_day_off=False))))
+        | ~Q(Exists(exceptions)) & (
+            Q(Exists(_fitting(weekly.filter(weekday=day.weekday()))))
+            | ~Q(Exists(weekly)) & Q(slot_minute__in=default_minutes)
+        )
+    )
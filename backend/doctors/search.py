@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = 'english'
+
+
+def search_limit():
+    return getattr(settings, 'DOCTOR_SEARCH_LIMIT', 50)
+
+
+def search_doctors(queryset, text):
+    """
+    Filter and rank doctors matching free text in name, specialization or bio.
+
+    On PostgreSQL this uses the trigger-maintained ``search_vector`` plus
+    pg_trgm similarity, both backed by GIN indexes. Other databases get a
+    plain icontains fallback so the test suite runs anywhere.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgres_search(queryset, text)
+    return _fallback_search(queryset, text)
+
+
+def _postgres_search(queryset, text):
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+    return queryset.annotate(
+        rank=SearchRank(F('search_vector'), query),
+        similarity=Greatest(
+            TrigramSimilarity('name', text),
+            TrigramSimilarity('specialization', text),
+        ),
+    ).filter(
+        Q(search_vector=query)
+        | Q(name__trigram_similar=text)
+        | Q(specialization__trigram_similar=text)
+    ).order_by('-rank', '-similarity', '-created_at', '-id')
+
+
+def _fallback_search(queryset, text):
+    for term in text.split():
+        queryset = queryset.filter(
+            Q(name__icontains=term)
+            | Q(specialization__icontains=term)
+            | Q(bio__icontains=term)
+        )
+
+    return queryset.annotate(
+        rank=Case(
+            When(name__icontains=text, then=Value(3)),
+            When(specialization__icontains=text, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('-rank', '-created_at', '-id')
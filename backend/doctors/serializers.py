@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Doctor
+from .models import CONSULTATION_MODES, Doctor
+from appointments.zones import is_valid_zone
 
 
 
@@ -42,6 +43,7 @@ class DoctorDetailSerializer(serializers.ModelSerializer):
             'bio',
             'years_of_experience',
             'consultation_modes',
+            'timezone',
             'is_available',
         ]
 
@@ -63,6 +65,7 @@ class DoctorAdminSerializer(serializers.ModelSerializer):
             'bio',
             'years_of_experience',
             'consultation_modes',
+            'timezone',
             'is_active',
             'created_at',
             'updated_at',
@@ -74,14 +77,18 @@ class DoctorAdminSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "At least one consultation mode is required."
             )
-        valid_modes = ['online', 'in-person']
         for mode in value:
-            if mode not in valid_modes:
+            if mode not in CONSULTATION_MODES:
                 raise serializers.ValidationError(
                     f"Invalid consultation mode: {mode}"
                 )
         return value
 
+    def validate_timezone(self, value):
+        if not is_valid_zone(value):
+            raise serializers.ValidationError(f"Unknown time zone: {value}")
+        return value
+
     def update(self, instance, validated_data):
         if 'bio' in validated_data and validated_data['bio'] == '':
             validated_data.pop('bio')
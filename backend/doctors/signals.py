@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import Doctor, ScheduleException, WeeklySchedule
+from .profile_cache import invalidate_profile
+from .schedules import invalidate_schedule
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def doctor_changed(sender, instance, **kwargs):
+    # Covers admin edits and AdminDoctorDetailView.destroy, which
+    # deactivates through save().
+    invalidate_catalog()
+    invalidate_profile(instance.pk)
+
+
+@receiver(post_save, sender=WeeklySchedule)
+@receiver(post_delete, sender=WeeklySchedule)
+@receiver(post_save, sender=ScheduleException)
+@receiver(post_delete, sender=ScheduleException)
+def schedule_changed(sender, instance, **kwargs):
+    invalidate_schedule(instance.doctor_id)
@@ -0,0 +1,127 @@
+"""
+Slot grids as integer bitmasks.
+
+A day is split into 5 minute ticks; bit ``n`` of a mask stands for the
+slot starting ``n * 5`` minutes after midnight. A grid's bookable slots,
+a doctor's booked slots and so on are all plain ints, so union,
+difference and membership are single integer operations.
+"""
+from datetime import time
+from functools import lru_cache
+
+TICK_MINUTES = 5
+TICKS_PER_DAY = 24 * 60 // TICK_MINUTES
+MASK_BYTES = TICKS_PER_DAY // 8
+
+TICK_LABELS = tuple(
+    f"{tick * TICK_MINUTES // 60:02d}:{tick * TICK_MINUTES % 60:02d}"
+    for tick in range(TICKS_PER_DAY)
+)
+
+
+def time_to_tick(value):
+    """Tick index of ``value``, or None if it does not fall on a tick."""
+    if value.second or value.microsecond or value.minute % TICK_MINUTES:
+        return None
+    return (value.hour * 60 + value.minute) // TICK_MINUTES
+
+
+def tick_to_time(tick):
+    minutes = tick * TICK_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def mask_to_bytes(mask):
+    return mask.to_bytes(MASK_BYTES, 'little')
+
+
+def mask_from_bytes(value):
+    return int.from_bytes(value, 'little') if value else 0
+
+
+def mask_before(value):
+    """Mask of every tick that starts before ``value``."""
+    minutes = value.hour * 60 + value.minute + bool(value.second or value.microsecond)
+    return (1 << -(-minutes // TICK_MINUTES)) - 1
+
+
+def labels_of(mask):
+    return [TICK_LABELS[tick] for tick in iter_ticks(mask)]
+
+
+def iter_ticks(mask):
+    """Yield the set bits of ``mask`` in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SlotGrid:
+    """
+    Bookable start times of one day, built from ``blocks`` of
+    ``(start, end, step)``: a slot starts every ``step`` minutes from
+    ``start`` and must finish by ``end``. Times and steps must fall on
+    TICK_MINUTES boundaries. Use ``grid_for`` to share equal grids.
+    """
+
+    __slots__ = ('blocks', 'ticks', 'mask')
+
+    def __init__(self, blocks=()):
+        self.blocks = tuple(blocks)
+        self.mask = 0
+        for start, end, step in self.blocks:
+            first, last = time_to_tick(start), time_to_tick(end)
+            if first is None or last is None or step <= 0 or step % TICK_MINUTES:
+                raise ValueError(f"Slot grid must be aligned to {TICK_MINUTES} minute ticks")
+            width = step // TICK_MINUTES
+            for tick in range(first, last - width + 1, width):
+                self.mask |= 1 << tick
+        self.ticks = tuple(iter_ticks(self.mask))
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def __contains__(self, value):
+        if value.second or value.microsecond or value.minute % TICK_MINUTES:
+            return False
+        return (self.mask >> ((value.hour * 60 + value.minute) // TICK_MINUTES)) & 1 == 1
+
+    def __repr__(self):
+        return f"SlotGrid({self.hours_label() or 'closed'})"
+
+    def within_hours(self, value):
+        return any(start <= value < end for start, end, _ in self.blocks)
+
+    def hours_label(self):
+        return ", ".join(f"{start:%H:%M}-{end:%H:%M}" for start, end, _ in self.blocks)
+
+    def mask_of(self, times):
+        """Bitmask of ``times``; values off the tick grid are ignored."""
+        mask = 0
+        for value in times:
+            tick = time_to_tick(value)
+            if tick is not None:
+                mask |= 1 << tick
+        return mask
+
+    def free(self, booked_mask):
+        return self.mask & ~booked_mask
+
+    def labels(self, mask):
+        """``"HH:MM"`` labels of the grid slots set in ``mask``."""
+        return labels_of(mask & self.mask)
+
+    def times(self, mask):
+        return [tick_to_time(tick) for tick in iter_ticks(mask & self.mask)]
+
+
+@lru_cache(maxsize=4096)
+def grid_for(blocks):
+    """Interned SlotGrid for a tuple of ``(start, end, step)`` blocks."""
+    return SlotGrid(sorted(blocks))
+
+
+# The clinic-wide default: 09:00-17:00 in 30 minute steps.
+DEFAULT_GRID = grid_for(((time(9, 0), time(17, 0), 30),))
+CLOSED_GRID = grid_for(())
@@ -1,3 +1,419 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .cache import VersionedCache
+from .fast_serializers import FastDoctorDetailSerializer, FastDoctorListSerializer
+from .models import Doctor, ScheduleException, WeeklySchedule, supports_mode_filter
+from .profile_cache import get_profile
+from .schedules import get_day_grid, slot_capacity
+from .slots import DEFAULT_GRID, SlotGrid, grid_for, mask_before, mask_from_bytes, mask_to_bytes, time_to_tick
+from .serializers import DoctorDetailSerializer, DoctorListSerializer
+
+
+def make_doctor(**kwargs):
+    return Doctor.objects.create(
+        name=kwargs.pop('name', 'Asha Rao'),
+        specialization=kwargs.pop('specialization', 'Cardiology'),
+        bio=kwargs.pop('bio', ''),
+        years_of_experience=10,
+        _consultation_modes=kwargs.pop('consultation_modes', ['online', 'in-person']),
+        **kwargs,
+    )
+
+
+def cursor_of(link):
+    return link.split('cursor=')[1].split('&')[0]
+
+
+@override_settings(DOCTOR_LIST_LEGACY_UNPAGINATED=False)
+class DoctorCursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctors = [make_doctor(name=f'Doctor {n}') for n in range(5)]
+
+    def test_pages_cover_every_doctor_once_newest_first(self):
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            page = self.client.get('/api/doctors/', params).json()
+            seen.extend(row['id'] for row in page['results'])
+            if not page['next']:
+                break
+            params['cursor'] = cursor_of(page['next'])
+
+        expected = Doctor.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    def test_previous_link_returns_to_the_first_page(self):
+        first = self.client.get('/api/doctors/', {'page_size': 2}).json()
+        second = self.client.get('/api/doctors/', {'page_size': 2, 'cursor': cursor_of(first['next'])}).json()
+        back = self.client.get('/api/doctors/', {'page_size': 2, 'cursor': cursor_of(second['previous'])}).json()
+
+        self.assertEqual(back['results'], first['results'])
+
+    def test_malformed_cursors_are_not_found(self):
+        tokens = ['not-base64!', base64.urlsafe_b64encode(b'[1, 2, 0]').decode()]
+        tokens.append(base64.urlsafe_b64encode(json.dumps(['yesterday', 'x', 0]).encode()).decode())
+        for token in tokens:
+            with self.subTest(token=token):
+                response = self.client.get('/api/doctors/', {'cursor': token})
+                self.assertEqual(response.status_code, 404)
+
+
+class DoctorSearchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cardiologist = make_doctor(name='Asha Rao', specialization='Cardiology')
+        self.surgeon = make_doctor(name='Vikram Rao', specialization='Surgery', bio='Heart valve repair')
+        make_doctor(name='Meera Iyer', specialization='Dermatology')
+
+    def search(self, text, **params):
+        response = self.client.get('/api/doctors/', {'q': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_every_term_must_match_some_field(self):
+        self.assertEqual(
+            {row['id'] for row in self.search('rao')},
+            {str(self.cardiologist.pk), str(self.surgeon.pk)},
+        )
+        self.assertEqual([row['id'] for row in self.search('rao heart')], [str(self.surgeon.pk)])
+        self.assertEqual(self.search('rao dermatology'), [])
+
+    @override_settings(DOCTOR_LIST_LEGACY_UNPAGINATED=False)
+    def test_paginated_search_is_one_page_in_the_usual_envelope(self):
+        page = self.search('rao', page_size=1)
+
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNone(page['next'])
+        self.assertIsNone(page['previous'])
+
+
+class SpecializationCatalogTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        make_doctor(specialization='Cardiology')
+        make_doctor(specialization='Cardiology')
+        self.dermatologist = make_doctor(specialization='Dermatology')
+        make_doctor(specialization='Neurology', is_active=False)
+
+    def test_counts_active_doctors_per_specialization(self):
+        self.assertEqual(
+            self.client.get('/api/doctors/specializations/catalog/').json(),
+            [
+                {'specialization': 'Cardiology', 'doctor_count': 2},
+                {'specialization': 'Dermatology', 'doctor_count': 1},
+            ],
+        )
+        self.assertEqual(
+            self.client.get('/api/doctors/specializations/').json(), ['Cardiology', 'Dermatology']
+        )
+
+    def test_cached_until_a_doctor_changes(self):
+        first = self.client.get('/api/doctors/specializations/catalog/')
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                '/api/doctors/specializations/catalog/', HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(cached.status_code, 304)
+
+        self.dermatologist.is_active = False
+        self.dermatologist.save()
+        changed = self.client.get(
+            '/api/doctors/specializations/catalog/', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json(), [{'specialization': 'Cardiology', 'doctor_count': 2}])
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctor = make_doctor()
+        self.other = make_doctor(name='Vikram Rao', specialization='Surgery')
+
+    def test_list_revalidates_in_one_query(self):
+        first = self.client.get('/api/doctors/')
+        with self.assertNumQueries(1):
+            again = self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_list_etag_follows_rows_and_filters(self):
+        first = self.client.get('/api/doctors/')
+        surgery = self.client.get('/api/doctors/', {'specialization': 'Surgery'})
+        self.assertNotEqual(surgery['ETag'], first['ETag'])
+
+        self.other.is_active = False
+        self.other.save()
+        after = self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual([row['id'] for row in after.json()], [str(self.doctor.pk)])
+
+    def test_detail_etag_covers_selected_fields(self):
+        url = f'/api/doctors/{self.doctor.pk}/'
+        full = self.client.get(url)
+        names = self.client.get(url, {'fields': 'id,name'})
+
+        self.assertEqual(names.json(), {'id': str(self.doctor.pk), 'name': 'Asha Rao'})
+        self.assertNotEqual(names['ETag'], full['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 200
+        )
+
+
+class FastSerializerTests(TestCase):
+
+    def setUp(self):
+        make_doctor(bio='Twenty years of practice')
+        make_doctor(name='Vikram Rao', consultation_modes=['online'], is_active=False)
+
+    def assert_same_output(self, fast_class, serializer_class):
+        doctors = Doctor.objects.order_by('name')
+        fast = fast_class()
+        self.assertEqual(
+            fast.serialize(doctors.values(*fast.values_fields())),
+            serializer_class(doctors, many=True).data,
+        )
+
+    def test_list_rows_match_the_model_serializer(self):
+        self.assert_same_output(FastDoctorListSerializer, DoctorListSerializer)
+
+    def test_detail_rows_match_the_model_serializer(self):
+        self.assert_same_output(FastDoctorDetailSerializer, DoctorDetailSerializer)
+
+    def test_fields_and_exclude_narrow_the_rows(self):
+        doctors = Doctor.objects.order_by('name')
+        fast = FastDoctorListSerializer(fields=['id', 'name', 'specialization'], exclude=['specialization'])
+
+        self.assertEqual(
+            fast.serialize(doctors.values(*fast.values_fields())),
+            [{'id': str(doctor.pk), 'name': doctor.name} for doctor in doctors],
+        )
+
+
+class ConsultationModeFilterTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.both = make_doctor()
+        self.online = make_doctor(name='Vikram Rao', consultation_modes=['online'])
+        self.in_person = make_doctor(name='Meera Iyer', consultation_modes=['in-person'])
+
+    def listed(self, **params):
+        return {row['id'] for row in self.client.get('/api/doctors/', params).json()}
+
+    def test_mode_filter_uses_the_mask(self):
+        self.assertEqual(self.listed(mode='online'), {str(self.both.pk), str(self.online.pk)})
+        self.assertEqual(
+            self.listed(consultation_type='in-person'), {str(self.both.pk), str(self.in_person.pk)}
+        )
+        self.assertEqual(self.client.get('/api/doctors/', {'mode': 'phone'}).status_code, 400)
+
+    def test_mask_follows_mode_changes(self):
+        self.online.consultation_modes = ['in-person']
+        self.online.save(update_fields=['_consultation_modes'])
+
+        self.assertTrue(Doctor.objects.filter(supports_mode_filter('in-person'), pk=self.online.pk).exists())
+        self.assertFalse(Doctor.objects.filter(supports_mode_filter('online'), pk=self.online.pk).exists())
+
+
+class BulkImportExportTests(TestCase):
+
+    csv_body = (
+        'name,specialization,bio,years_of_experience,consultation_modes\n'
+        'Asha Rao,Cardiology,Heart care,12,online;in-person\n'
+        'No Years,Cardiology,,,online\n'
+        'Meera Iyer,Dermatology,Skin care,7,online\n'
+    )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+
+    def import_csv(self, query=''):
+        return self.client.post(
+            '/api/doctors/admin/import/' + query, self.csv_body, content_type='text/csv'
+        ).json()
+
+    def test_import_creates_valid_rows_and_reports_the_rest(self):
+        result = self.import_csv()
+
+        self.assertEqual((result['created'], result['failed']), (2, 1))
+        self.assertEqual(result['errors'][0]['line'], 3)
+        self.assertEqual(
+            dict(Doctor.objects.values_list('name', 'consultation_mode_mask')),
+            {'Asha Rao': 3, 'Meera Iyer': 1},
+        )
+
+    def test_dry_run_writes_nothing(self):
+        result = self.import_csv('?dry_run=true')
+
+        self.assertEqual(result['created'], 2)
+        self.assertFalse(Doctor.objects.exists())
+
+    def test_ndjson_export_round_trips(self):
+        self.import_csv()
+        response = self.client.get('/api/doctors/admin/export/', {'output': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            sorted((row['name'], row['consultation_modes']) for row in rows),
+            [('Asha Rao', ['online', 'in-person']), ('Meera Iyer', ['online'])],
+        )
+
+
+class SparseFieldsetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctor = make_doctor()
+
+    def test_list_returns_only_requested_fields(self):
+        self.assertEqual(
+            self.client.get('/api/doctors/', {'fields': 'id,name'}).json(),
+            [{'id': str(self.doctor.pk), 'name': 'Asha Rao'}],
+        )
+        row = self.client.get('/api/doctors/', {'exclude': 'years_of_experience,consultation_modes'}).json()[0]
+        self.assertNotIn('consultation_modes', row)
+        self.assertIn('specialization', row)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/doctors/', {'fields': 'id,salary'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('salary', response.json()['fields'])
+
+
+class ProfileCacheTests(TestCase):
+
+    def test_profile_is_read_through_and_dropped_on_save(self):
+        doctor = make_doctor()
+        get_profile(doctor.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_profile(doctor.pk).name, 'Asha Rao')
+
+        doctor.name = 'Asha R. Rao'
+        doctor.save()
+        self.assertEqual(get_profile(doctor.pk).data['name'], 'Asha R. Rao')
+
+
+@override_settings(DOCTOR_CACHE_ALIAS='default')
+class VersionedCacheTests(TestCase):
+    """Two VersionedCache instances stand in for two worker processes."""
+
+    def setUp(self):
+        cache.clear()
+        self.loads = []
+        self.workers = [VersionedCache('tests:versioned') for _ in range(2)]
+
+    def load_many(self, keys):
+        self.loads.append(sorted(keys))
+        return {key: key.upper() for key in keys}
+
+    def test_workers_share_loaded_values(self):
+        first, second = self.workers
+
+        self.assertEqual(first.get_many(['a', 'b'], self.load_many), {'a': 'A', 'b': 'B'})
+        self.assertEqual(second.get_many(['a', 'b', 'c'], self.load_many), {'a': 'A', 'b': 'B', 'c': 'C'})
+        self.assertEqual(self.loads, [['a', 'b'], ['c']])
+
+    def test_invalidate_reaches_the_other_worker(self):
+        first, second = self.workers
+        first.get_many(['a', 'b'], self.load_many)
+        second.get_many(['a', 'b'], self.load_many)
+
+        first.invalidate('a')
+        second.get_many(['a', 'b'], self.load_many)
+        self.assertEqual(self.loads, [['a', 'b'], ['a']])
+
+
+class SlotGridTests(TestCase):
+
+    def test_default_grid_is_half_hourly_from_nine_to_five(self):
+        self.assertEqual(len(DEFAULT_GRID), 16)
+        self.assertEqual(DEFAULT_GRID.labels(DEFAULT_GRID.mask)[:2], ['09:00', '09:30'])
+        self.assertEqual(DEFAULT_GRID.labels(DEFAULT_GRID.mask)[-1], '16:30')
+        self.assertIn(time(16, 30), DEFAULT_GRID)
+        self.assertNotIn(time(17, 0), DEFAULT_GRID)
+        self.assertNotIn(time(9, 15), DEFAULT_GRID)
+
+    def test_free_slots_are_the_grid_minus_booked(self):
+        booked = DEFAULT_GRID.mask_of([time(9, 0), time(10, 30), time(9, 2)])
+
+        self.assertEqual(len(DEFAULT_GRID.labels(DEFAULT_GRID.free(booked))), 14)
+        self.assertEqual(DEFAULT_GRID.times(booked), [time(9, 0), time(10, 30)])
+        self.assertEqual(mask_from_bytes(mask_to_bytes(booked)), booked)
+
+    def test_blocks_with_their_own_step(self):
+        blocks = ((time(14, 0), time(15, 0), 20), (time(8, 0), time(9, 0), 45))
+        grid = grid_for(blocks)
+
+        self.assertEqual(grid.labels(grid.mask), ['08:00', '14:00', '14:20', '14:40'])
+        self.assertIs(grid_for(blocks), grid)
+        with self.assertRaises(ValueError):
+            SlotGrid([(time(9, 0), time(10, 0), 7)])
+
+    def test_ticks_and_elapsed_masks(self):
+        self.assertIsNone(time_to_tick(time(9, 2)))
+        self.assertEqual(mask_before(time(9, 0)), (1 << time_to_tick(time(9, 0))) - 1)
+        self.assertEqual(mask_before(time(9, 0, 1)), (1 << time_to_tick(time(9, 5))) - 1)
+
+
+class ScheduleTests(TestCase):
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        today = date.today()
+        self.monday = today + timedelta(days=7 - today.weekday())
+        self.tuesday = self.monday + timedelta(days=1)
+
+    def labels(self, day):
+        grid = get_day_grid(self.doctor.pk, day)
+        return grid.labels(grid.mask)
+
+    def capacity(self, day):
+        return Doctor.objects.filter(pk=self.doctor.pk).annotate(
+            capacity=slot_capacity(day)
+        ).values_list('capacity', flat=True).get()
+
+    def test_weekly_blocks_replace_the_default_grid(self):
+        self.assertEqual(len(self.labels(self.monday)), 16)
+        WeeklySchedule.objects.create(
+            doctor=self.doctor, weekday=0, start_time=time(8, 0), end_time=time(9, 0), slot_minutes=20
+        )
+
+        self.assertEqual(self.labels(self.monday), ['08:00', '08:20', '08:40'])
+        self.assertEqual(self.labels(self.tuesday), [])
+        self.assertEqual((self.capacity(self.monday), self.capacity(self.tuesday)), (3, 0))
+
+    def test_exceptions_override_the_weekday(self):
+        ScheduleException.objects.create(doctor=self.doctor, date=self.monday, is_day_off=True)
+        ScheduleException.objects.create(
+            doctor=self.doctor, date=self.tuesday, start_time=time(13, 0), end_time=time(14, 0), slot_minutes=15
+        )
+
+        self.assertEqual(self.labels(self.monday), [])
+        self.assertEqual(self.labels(self.tuesday), ['13:00', '13:15', '13:30', '13:45'])
+        self.assertEqual((self.capacity(self.monday), self.capacity(self.tuesday)), (0, 4))
+
+    def test_partial_day_capacity_counts_later_slots_only(self):
+        ten = time_to_tick(time(10, 0))
+        capacity = Doctor.objects.filter(pk=self.doctor.pk).annotate(
+            capacity=slot_capacity(self.monday, ten)
+        ).values_list('capacity', flat=True).get()
+
+        self.assertEqual(capacity, 14)
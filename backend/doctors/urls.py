@@ -3,15 +3,23 @@ from .views import (
     DoctorListView,
     DoctorDetailView,
     SpecializationListView,
+    SpecializationCatalogView,
     AdminDoctorListCreateView,
-    AdminDoctorDetailView
+    AdminDoctorDetailView,
+    AdminDoctorImportView,
+    AdminDoctorExportView,
+    AdminDoctorCacheStatsView,
 )
 
 urlpatterns = [
     path('', DoctorListView.as_view(), name='doctor-list'),
     path('<uuid:pk>/', DoctorDetailView.as_view(), name='doctor-detail'),
     path('specializations/', SpecializationListView.as_view(), name='specializations'),
+    path('specializations/catalog/', SpecializationCatalogView.as_view(), name='specialization-catalog'),
 
     path('admin/', AdminDoctorListCreateView.as_view(), name='admin-doctor-list'),
     path('admin/<uuid:pk>/', AdminDoctorDetailView.as_view(), name='admin-doctor-detail'),
+    path('admin/import/', AdminDoctorImportView.as_view(), name='admin-doctor-import'),
+    path('admin/export/', AdminDoctorExportView.as_view(), name='admin-doctor-export'),
+    path('admin/cache-stats/', AdminDoctorCacheStatsView.as_view(), name='admin-doctor-cache-stats'),
 ]
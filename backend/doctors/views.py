@@ -1,22 +1,47 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from django.db.models import Q
-from .models import Doctor
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+from django.http import Http404, StreamingHttpResponse
+from datetime import datetime
+import codecs
+from .bulk import FORMATS, export_lines, format_from_content_type, import_doctors, read_rows
+from .catalog import get_catalog
+from .conditional import (
+    ConditionalListMixin,
+    not_modified,
+    set_validators,
+    weak_etag,
+)
+from .fast_serializers import (
+    FastDoctorAvailabilitySerializer,
+    FastDoctorDetailSerializer,
+    FastDoctorListSerializer,
+    FastListMixin,
+    FastSerializerMixin,
+)
+from .models import CONSULTATION_MODES, Doctor, supports_mode_filter
+from .pagination import DoctorCursorPagination
+from .profile_cache import get_profile, profile_cache_stats
+from .search import search_doctors, search_limit
 from .serializers import (
     DoctorListSerializer,
     DoctorDetailSerializer,
     DoctorAdminSerializer
 )
+from appointments.availability import free_slots_state, with_free_slots
 
 class IsAdminUser(permissions.BasePermission):
   
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and request.user.is_staff
 
-class DoctorListView(generics.ListAPIView):
+class DoctorListView(ConditionalListMixin, FastListMixin, generics.ListAPIView):
 
     serializer_class = DoctorListSerializer
+    fast_serializer_class = FastDoctorListSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = DoctorCursorPagination
     
     def get_queryset(self):
         queryset = Doctor.objects.filter(is_active=True)
@@ -26,25 +51,101 @@ class DoctorListView(generics.ListAPIView):
             queryset = queryset.filter(
                 specialization__icontains=specialization
             )
+
+        for param in ('mode', 'consultation_type'):
+            mode = self.request.query_params.get(param)
+            if not mode:
+                continue
+            if mode not in CONSULTATION_MODES:
+                raise ValidationError({param: f"Invalid consultation mode: {mode}"})
+            queryset = queryset.filter(supports_mode_filter(mode))
+
+        day = self.get_available_on()
+        if day:
+            queryset = with_free_slots(queryset, day)
+
+        query = self.request.query_params.get('q', '').strip()
+        if query:
+            queryset = search_doctors(queryset, query)[:search_limit()]
         
         return queryset
 
-class DoctorDetailView(generics.RetrieveAPIView):
+    def get_available_on(self):
+        available_on = self.request.query_params.get('available_on')
+        if not available_on:
+            return None
+        try:
+            return datetime.strptime(available_on, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError(
+                {'available_on': "Invalid date format. Use YYYY-MM-DD"}
+            )
+
+    def extra_validator_state(self, request):
+        # free_slots moves with bookings, holds and the clock, none of
+        # which touch Doctor rows.
+        day = self.get_available_on()
+        return free_slots_state(day) if day else ()
+
+    def get_fast_serializer_class(self):
+        if self.request.query_params.get('available_on'):
+            return FastDoctorAvailabilitySerializer
+        return self.fast_serializer_class
+
+    def paginate_queryset(self, queryset):
+        # Search results are ordered by relevance, not by the pagination
+        # key, and are already capped at DOCTOR_SEARCH_LIMIT.
+        if self.request.query_params.get('q', '').strip():
+            return self.paginator.paginate_as_one_page(queryset, self.request)
+        return super().paginate_queryset(queryset)
+
+class DoctorDetailView(FastSerializerMixin, generics.RetrieveAPIView):
 
     serializer_class = DoctorDetailSerializer
+    fast_serializer_class = FastDoctorDetailSerializer
     permission_classes = [permissions.AllowAny]
     queryset = Doctor.objects.filter(is_active=True)
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        profile = get_profile(pk)
+        if profile is None or not profile.is_active:
+            raise Http404
+
+        # The same doctor under a different ?fields= is a different body.
+        names = [field.name for field in self.get_fast_serializer().selected]
+        etag = weak_etag(pk, profile.updated_at.isoformat(), *names)
+        last_modified = int(profile.updated_at.timestamp())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        data = {name: profile.data[name] for name in names}
+        return set_validators(Response(data), etag, last_modified)
+
 class SpecializationListView(generics.GenericAPIView):
 
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
-        specializations = Doctor.objects.filter(
-            is_active=True
-        ).values_list('specialization', flat=True).distinct().order_by('specialization')
-        
-        return Response(list(specializations))
+        catalog = get_catalog()
+        return catalog_response(request, catalog.names, f'"{catalog.digest}-names"')
+
+
+class SpecializationCatalogView(generics.GenericAPIView):
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        catalog = get_catalog()
+        return catalog_response(request, catalog.items, f'"{catalog.digest}"')
+
+
+def catalog_response(request, data, etag):
+    response = not_modified(request, etag)
+    if response is None:
+        response = set_validators(Response(data), etag)
+    return response
 
 
 class AdminDoctorListCreateView(generics.ListCreateAPIView):
@@ -60,11 +161,11 @@ class AdminDoctorListCreateView(generics.ListCreateAPIView):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(specialization__icontains=search)
-            )
+        search = self.request.query_params.get(
+            'q', self.request.query_params.get('search', '')
+        )
+        if search.strip():
+            queryset = search_doctors(queryset, search)
         
         return queryset
 
@@ -82,4 +183,77 @@ class AdminDoctorDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Response(
             {'message': 'Doctor deactivated successfully'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class AdminDoctorCacheStatsView(APIView):
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'doctor_profiles': profile_cache_stats()})
+
+
+class AdminDoctorImportView(APIView):
+    """
+    Bulk-create doctors from a CSV or NDJSON request body, chosen by
+    Content-Type (text/csv or application/x-ndjson). The body is streamed,
+    validated row by row and inserted in chunks. ?dry_run=true only validates.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        fmt = format_from_content_type(request.content_type)
+        if fmt is None:
+            return Response(
+                {'error': 'Content-Type must be text/csv or application/x-ndjson'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        if request.stream is None:
+            return Response(
+                {'error': 'Request body is empty'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = codecs.iterdecode(request.stream, 'utf-8-sig')
+        dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+        result = import_doctors(read_rows(lines, fmt), dry_run=dry_run)
+
+        return Response(
+            {
+                'created': result.created,
+                'failed': len(result.errors),
+                'errors': result.errors,
+                'dry_run': dry_run,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class AdminDoctorExportView(APIView):
+    """
+    Stream every doctor as CSV (default) or NDJSON via ?output=ndjson.
+    Supports the same ?is_active= filter as the admin list.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Doctor.objects.all()
+        is_active = request.query_params.get('is_active', None)
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_lines(queryset, fmt), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="doctors.{fmt}"'
+        return response